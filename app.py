@@ -18,10 +18,17 @@ from config.job_roles import JOB_ROLES
 from utils.ai_resume_analyzer import AIResumeAnalyzer
 from utils.resume_builder import ResumeBuilder
 from utils.resume_analyzer import ResumeAnalyzer
+from utils.extraction_cache import get_extraction_cache
+from utils.text_extraction import extract_text
+from utils import ai_executor
+from utils.tiered_analysis import KEYWORD_SOURCE, keyword_tier, merge_tiers
 import traceback
 import plotly.express as px
 import pandas as pd
 import json
+import time
+import uuid
+import hashlib
 import datetime
 
 # Ensure DB tables exist before starting Streamlit
@@ -131,6 +138,9 @@ class ResumeApp:
             st.rerun()
 
         current_page = st.session_state.get('page', 'home')
+        if current_page != 'resume_analyzer':
+            # Leaving the analyzer abandons any AI analysis still in flight
+            self.cancel_ai_analysis()
         page_mapping = {name.lower().replace(" ", "_").replace("🏠", "").replace("🔍", "").replace("📝", "").replace("📊", "").replace("🎯", "").replace("💬", "").replace("ℹ️", "").strip(): name for name in self.pages.keys()}
 
         if current_page in page_mapping:
@@ -205,6 +215,109 @@ class ResumeApp:
         feature_card("fas fa-chart-line", "Career Insights", "Access detailed analytics.")
         st.markdown('</div>', unsafe_allow_html=True)
 
+    def extract_uploaded_resume(self, uploaded_file):
+        """Extract text and page count from an upload, reusing cached results for identical files"""
+        file_type = {
+            "application/pdf": "pdf",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx"
+        }.get(uploaded_file.type)
+        if file_type is None:
+            return None
+        file_bytes = uploaded_file.getvalue()
+        # Documents over 3 pages are rejected, so never extract past page 3. Results with pages OCR
+        # could not read (timed out or empty) are not cached, so the next upload tries again
+        return get_extraction_cache().get_or_extract(
+            file_bytes, "text_extraction-3", lambda: extract_text(file_bytes, file_type, max_pages=3),
+            should_cache=lambda entry: not entry.get('ocr_incomplete')
+        )
+
+    def cancel_ai_analysis(self):
+        """Cancel this session's queued or running AI analysis, if any"""
+        if st.session_state.get('ai_job'):
+            ai_executor.get_ai_executor().cancel_owner(st.session_state.ai_session_id)
+            st.session_state.ai_job = None
+
+    def cached_keyword_tier(self, text, job_role, role_info):
+        """Run the keyword tier once per resume and role; reruns while polling reuse it"""
+        signature = hashlib.sha256(f"{job_role}\x1f{text}".encode('utf-8')).hexdigest()
+        cached = st.session_state.get('ai_keyword_tier')
+        if not cached or cached['signature'] != signature:
+            cached = st.session_state.ai_keyword_tier = {
+                'signature': signature, 'result': keyword_tier(self.analyzer, text, role_info)
+            }
+        return cached['result']
+
+    def poll_ai_analysis(self, text, job_role, role_info, model, heuristic=None):
+        """Run the AI analysis on the shared executor and return its result once ready.
+
+        The first call submits a job; while it is running this shows the
+        sections streamed so far and reruns the script until the result is in.
+        """
+        executor = ai_executor.get_ai_executor()
+        if 'ai_session_id' not in st.session_state:
+            st.session_state.ai_session_id = uuid.uuid4().hex
+        signature = hashlib.sha256(f"{job_role}\x1f{model}\x1f{text}".encode('utf-8')).hexdigest()
+
+        job = st.session_state.get('ai_job')
+        if not job or job['signature'] != signature:
+            # New resume, role or model: drop the previous job and start over
+            self.cancel_ai_analysis()
+            job_id = executor.submit(
+                self.ai_analyzer.analyze_resume, text,
+                job_role=job_role, role_info=role_info, model=model, heuristic=heuristic,
+                owner=st.session_state.ai_session_id, with_cancel_event=True, with_progress=True
+            )
+            if job_id is None:
+                return {"error": "The AI analyzer is busy right now. Please try again in a moment."}
+            job = st.session_state.ai_job = {'id': job_id, 'signature': signature}
+
+        state, result, error = executor.result(job['id'])
+        if state in (ai_executor.PENDING, ai_executor.RUNNING):
+            progress = executor.progress(job['id'])
+            if progress['chars_received']:
+                st.info(f"AI analysis streaming ({executor.elapsed(job['id']):.0f}s, "
+                        f"{len(progress['sections'])} sections ready)...")
+            else:
+                st.info(f"AI analysis in progress ({executor.elapsed(job['id']):.0f}s)...")
+            if st.button("Cancel AI analysis", key="cancel_ai_analysis"):
+                self.cancel_ai_analysis()
+                st.stop()
+            # Show each section as soon as the model has finished writing it
+            for title, body in progress['sections']:
+                with st.expander(title, expanded=True):
+                    st.markdown(body or "_No content._")
+            time.sleep(0.5 if progress['chars_received'] else 1)
+            st.rerun()
+        if state is None:
+            # The finished job expired before it was collected; run it again
+            st.session_state.ai_job = None
+            st.rerun()
+        if state == ai_executor.DONE:
+            return result
+        if state == ai_executor.CANCELLED:
+            return {"error": "AI analysis was cancelled."}
+        return {"error": error or "AI analysis failed."}
+
+    def render_keyword_tier(self, result):
+        """Show the instant keyword analysis while the AI analysis is still running"""
+        if 'error' in result:
+            return
+        keyword_match = result.get('keyword_match', {})
+        found = ', '.join(keyword_match.get('found_skills', [])) or 'None'
+        missing = ', '.join(keyword_match.get('missing_skills', [])) or 'None'
+        suggestions = ''.join(f"<li>{item}</li>" for item in result.get('suggestions', [])[:5])
+        st.markdown(f"""
+            <div class='feature-card' style='margin-bottom:24px;'>
+                <h3>⚡ Instant Keyword Analysis</h3>
+                <div style='font-size:0.8rem;opacity:0.8;'>Source: {KEYWORD_SOURCE} ({result.get('elapsed_ms', 0):.0f} ms)</div>
+                <div><b>ATS Score:</b> {result.get('ats_score', 0)}/100</div>
+                <div><b>Keyword Match:</b> {keyword_match.get('score', 0):.0f}%</div>
+                <div><b>Skills Found:</b> {found}</div>
+                <div><b>Skills Missing:</b> {missing}</div>
+                <ul>{suggestions}</ul>
+            </div>
+        """, unsafe_allow_html=True)
+
     def render_analyzer(self):
         apply_modern_styles()
         page_header("Resume Analyzer", "Get instant AI-powered feedback to optimize your resume")
@@ -226,6 +339,7 @@ class ResumeApp:
                 <p>{', '.join(role_info['required_skills'])}</p>
             </div>
             """, unsafe_allow_html=True)
+            compare_all_roles = st.checkbox("Also rank my resume against all roles", key="standard_all_roles")
 
             st.markdown("---")
             st.subheader("Upload Your Resume")
@@ -235,32 +349,11 @@ class ResumeApp:
                 st.subheader("Resume Analysis Results")
                 with st.spinner("Analyzing your resume..."):
                     try:
-                        num_pages = 1
-                        if uploaded_file.type == "application/pdf":
-                            try:
-                                from PyPDF2 import PdfReader
-                                uploaded_file.seek(0)
-                                reader = PdfReader(uploaded_file)
-                                num_pages = len(reader.pages)
-                            except Exception:
-                                pass
-                            uploaded_file.seek(0)
-                            text = self.analyzer.extract_text_from_pdf(uploaded_file)
-                        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                            try:
-                                from docx import Document
-                                uploaded_file.seek(0)
-                                doc = Document(uploaded_file)
-                                num_pages = len(doc.element.xpath('//w:sectPr'))
-                                if num_pages == 0:
-                                    num_pages = 1
-                            except Exception:
-                                pass
-                            uploaded_file.seek(0)
-                            text = self.analyzer.extract_text_from_docx(uploaded_file)
-                        else:
+                        extracted = self.extract_uploaded_resume(uploaded_file)
+                        if extracted is None:
                             st.error("Unsupported file type.")
                             return
+                        text, num_pages = extracted['text'], extracted['num_pages']
                         if num_pages > 3:
                             st.warning("Please upload a resume file (max 2 pages). The uploaded document has more than 3 pages and does not appear to be a resume.")
                             st.stop()
@@ -287,7 +380,16 @@ class ResumeApp:
                             st.stop()
                         resume_data = {'raw_text': text}
                         job_requirements = role_info
-                        analysis = self.analyzer.analyze_resume(resume_data, job_requirements)
+                        role_ranking = None
+                        if compare_all_roles:
+                            # One keyword scan scores every role; reuse the selected role's result
+                            role_ranking = self.analyzer.rank_roles(resume_data, self.job_roles)
+                            analysis = role_ranking.get('analysis') or next(
+                                r['analysis'] for r in role_ranking['rankings']
+                                if r['category'] == selected_category and r['role'] == selected_role
+                            )
+                        else:
+                            analysis = self.analyzer.analyze_resume(resume_data, job_requirements)
                     except Exception as e:
                         st.error(f"Error analyzing resume: {str(e)}")
                         return
@@ -339,6 +441,23 @@ class ResumeApp:
                     </div>
                     """, unsafe_allow_html=True)
 
+                    # Role fit across all roles
+                    if role_ranking and role_ranking.get('rankings'):
+                        st.markdown("""
+                        <div class='feature-card' style='margin-bottom:24px;'>
+                            <h2>Role Fit Across All Roles</h2>
+                        </div>
+                        """, unsafe_allow_html=True)
+                        st.dataframe(pd.DataFrame([
+                            {
+                                'Role': r['role'],
+                                'Category': r['category'],
+                                'ATS Score': r['ats_score'],
+                                'Keyword Match (%)': int(r['keyword_match_score'])
+                            }
+                            for r in role_ranking['rankings']
+                        ]), use_container_width=True, hide_index=True)
+
                     # Resume Improvement Suggestions
                     suggestions = analysis.get('suggestions', {})
                     if isinstance(suggestions, list):
@@ -460,7 +579,7 @@ class ResumeApp:
             """, unsafe_allow_html=True)
 
             # Step 1: Select AI Model
-            ai_models = ["Google Gemini", "OpenAI GPT-4", "Custom Model"]
+            ai_models = ["Google Gemini", "OpenAI GPT-4", "Custom Model", "Local Model"]
             selected_ai_model = st.selectbox("Select AI Model", ai_models, key="ai_model")
 
             # Step 2: Optionally use custom job description
@@ -490,32 +609,11 @@ class ResumeApp:
                 st.subheader("AI Analysis Results")
                 with st.spinner("Analyzing your resume with AI..."):
                     try:
-                        num_pages = 1
-                        if uploaded_file.type == "application/pdf":
-                            try:
-                                from PyPDF2 import PdfReader
-                                uploaded_file.seek(0)
-                                reader = PdfReader(uploaded_file)
-                                num_pages = len(reader.pages)
-                            except Exception:
-                                pass
-                            uploaded_file.seek(0)
-                            text = self.ai_analyzer.extract_text_from_pdf(uploaded_file)
-                        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                            try:
-                                from docx import Document
-                                uploaded_file.seek(0)
-                                doc = Document(uploaded_file)
-                                num_pages = len(doc.element.xpath('//w:sectPr'))
-                                if num_pages == 0:
-                                    num_pages = 1
-                            except Exception:
-                                pass
-                            uploaded_file.seek(0)
-                            text = self.ai_analyzer.extract_text_from_docx(uploaded_file)
-                        else:
+                        extracted = self.extract_uploaded_resume(uploaded_file)
+                        if extracted is None:
                             st.error("Unsupported file type.")
                             return
+                        text, num_pages = extracted['text'], extracted['num_pages']
                         if num_pages > 3:
                             st.warning("Please upload a resume file (max 2 pages). The uploaded document has more than 3 pages and does not appear to be a resume.")
                             st.stop()
@@ -542,20 +640,26 @@ class ResumeApp:
                         if (len(found_keywords) < 3 or len(text) < 600 or not (name_like or email_like) or not has_main_section or (is_report and len(found_keywords) < 4)):
                             st.warning("Please upload the correct resume. The uploaded document does not appear to be a resume.")
                             st.stop()
-                        analysis = self.ai_analyzer.analyze_resume(
-                            text,
-                            job_role=selected_role,
-                            role_info=role_info,
-                            model=selected_ai_model
-                        )
+                        # Instant keyword tier first; the AI result is merged in when it arrives
+                        keyword_result = self.cached_keyword_tier(text, selected_role, role_info)
+                        self.render_keyword_tier(keyword_result)
+                        analysis = self.poll_ai_analysis(text, selected_role, role_info, selected_ai_model,
+                                                         keyword_result if 'error' not in keyword_result else None)
                         if 'error' in analysis:
                             st.error(f"AI Analysis Error: {analysis['error']}")
+                            if 'error' not in keyword_result:
+                                st.info("The keyword analysis above is still available.")
                             return
+                        analysis = merge_tiers(keyword_result, analysis)
                     except Exception as e:
                         st.error(f"Error in AI analysis: {str(e)}")
                         return
 
-                    st.success("Analysis complete!")
+                    if analysis.get('fallback'):
+                        st.warning("The AI service is busy or unavailable right now, so these results come from "
+                                   "the keyword-based ATS analysis. Try again in a minute for the full AI report.")
+                    else:
+                        st.success("Analysis complete!")
                     st.markdown("## Full Analysis Report")
                     # Header
                     st.markdown(f"""
@@ -579,20 +683,27 @@ class ResumeApp:
                                 <h3>Resume Score</h3>
                                 <div style='font-size:2.5rem;color:#4CAF50;font-weight:bold;'>{resume_score}</div>
                                 <div style='color:#4CAF50;font-weight:bold;'>Good</div>
+                                <div style='font-size:0.8rem;opacity:0.8;'>Source: {analysis.get('provenance', {}).get('resume_score', 'N/A')}</div>
                             </div>
                             <div style='flex:1;'>
                                 <h3>ATS Optimization Score</h3>
                                 <div style='font-size:2.5rem;color:#FF4444;font-weight:bold;'>{ats_score}</div>
                                 <div style='color:#FF4444;font-weight:bold;'>Needs Improvement</div>
+                                <div style='font-size:0.8rem;opacity:0.8;'>Source: {analysis.get('provenance', {}).get('ats_score', 'N/A')}
+                                    (keyword ATS score: {analysis.get('keyword_ats_score', 'N/A')})</div>
                                     <div><b>Overall Score:</b> {analysis.get('score', 'N/A')}</div>
                         </div>
                     """, unsafe_allow_html=True)
 
 
-                    def section(title, content, color):
+                    provenance = analysis.get('provenance', {})
+
+                    def section(title, content, color, source=None):
+                        source_line = f"<div style='font-size:0.8rem;opacity:0.8;'>Source: {source}</div>" if source else ""
                         return f"""
                         <div class='feature-card' style='margin-bottom:24px;background:{color};'>
                             <h3>{title}</h3>
+                            {source_line}
                             <div>{content if content else '<span style=\'color:#aaa\'>No content available.</span>'}</div>
                         </div>
                         """
@@ -626,11 +737,12 @@ class ResumeApp:
                             content = None
                         # Only render if content is not None and not empty
                         if content and str(content).strip():
-                            st.markdown(section(title, content, color), unsafe_allow_html=True)
+                            st.markdown(section(title, content, color, provenance.get(key)), unsafe_allow_html=True)
 
                     # Show the full AI report only once at the end (optional)
                     if analysis.get('full_response'):
-                        st.markdown(section("📝 Full AI Report", analysis['full_response'], "#607d8b"), unsafe_allow_html=True)
+                        st.markdown(section("📝 Full AI Report", analysis['full_response'], "#607d8b",
+                                            provenance.get('full_response')), unsafe_allow_html=True)
 
     def render_dashboard(self):
         self.dashboard_manager.render_dashboard()
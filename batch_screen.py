@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Batch resume screening for Smart AI Resume Analyzer
+Scores a directory (or list) of PDF/DOCX resumes against a job role (or ranks
+them against every role) across a process pool and streams one JSON line per
+resume as soon as it is scored.
+
+With --ai, each resume is analyzed by the AI model instead, with bounded
+concurrency, retries on rate limits and a SQLite checkpoint per resume.
+
+Example:
+    python batch_screen.py resumes/ --role "Data Scientist" -o results.jsonl
+    python batch_screen.py resumes/ --role "Data Scientist" -o results.jsonl --resume
+    python batch_screen.py resumes/ --role all -o rankings.jsonl
+    python batch_screen.py resumes/ --role "Data Scientist" --ai --concurrency 4 -o ai.jsonl --resume
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from config.job_roles import JOB_ROLES
+from utils.resume_analyzer import ResumeAnalyzer
+from utils.text_extraction import extract_text
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+# One analyzer per worker process, created on first use
+_worker_analyzer = None
+
+
+def find_role(role_name):
+    """Return (category, role_name, role_info) for a role name in JOB_ROLES"""
+    for category, roles in JOB_ROLES.items():
+        for name, role_info in roles.items():
+            if name.lower() == role_name.lower():
+                return category, name, role_info
+    available = ', '.join(name for roles in JOB_ROLES.values() for name in roles)
+    raise SystemExit(f"Unknown role '{role_name}'. Available roles: {available}")
+
+
+def collect_files(inputs):
+    """Expand directories and return a sorted list of resume files"""
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(
+                    os.path.join(root, name) for name in names
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS)
+                )
+        elif path.lower().endswith(SUPPORTED_EXTENSIONS):
+            files.append(path)
+        else:
+            print(f"Skipping unsupported file: {path}", file=sys.stderr)
+    return sorted(set(os.path.abspath(f) for f in files))
+
+
+def load_checkpoint(output_path):
+    """Return the files already recorded in an existing results file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['file'])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def trim_partial_line(output_path):
+    """Drop an incomplete trailing record left by an interrupted run"""
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as f:
+        content = f.read()
+        if content and not content.endswith(b'\n'):
+            f.truncate(content.rfind(b'\n') + 1)
+
+
+def screen_file(path, role_name, role_info):
+    """Extract and score a single resume (runs inside a worker process)"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = ResumeAnalyzer()
+
+    started = time.perf_counter()
+    record = {'file': path, 'role': role_name}
+    try:
+        # Files are already spread across processes, so pages are read sequentially
+        text = extract_text(path, parallel=False)['text']
+
+        if role_info is None:
+            # "all" mode: one scan ranks the resume against every role
+            ranking = _worker_analyzer.rank_roles({'raw_text': text}, JOB_ROLES)
+            record['document_type'] = ranking['document_type']
+            record['rankings'] = [
+                {key: entry[key] for key in ('category', 'role', 'ats_score', 'keyword_match_score')}
+                for entry in ranking['rankings']
+            ]
+            if 'error' in ranking.get('analysis', {}):
+                record['error'] = ranking['analysis']['error']
+            record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return record
+
+        analysis = _worker_analyzer.analyze_resume({'raw_text': text}, role_info)
+        keyword_match = analysis.get('keyword_match', {})
+        record.update({
+            'name': analysis.get('name', ''),
+            'email': analysis.get('email', ''),
+            'document_type': analysis.get('document_type'),
+            'ats_score': analysis.get('ats_score', 0),
+            'keyword_match_score': keyword_match.get('score', 0),
+            'found_skills': keyword_match.get('found_skills', []),
+            'missing_skills': keyword_match.get('missing_skills', []),
+            'section_score': analysis.get('section_score', 0),
+            'format_score': analysis.get('format_score', 0),
+            'suggestions': analysis.get('suggestions', []),
+        })
+        if 'error' in analysis:
+            record['error'] = analysis['error']
+    except Exception as e:
+        record['error'] = str(e)
+    record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+def report_progress(done, total, started):
+    """Print a single-line progress report to stderr"""
+    elapsed = time.monotonic() - started
+    rate = done / elapsed if elapsed > 0 else 0
+    eta = (total - done) / rate if rate > 0 else 0
+    print(f"\r[{done}/{total}] {rate:.1f} resumes/s, ETA {eta:.0f}s", end='', file=sys.stderr, flush=True)
+
+
+def run_batch(files, role_name, role_info, output, workers=None, max_pending=None):
+    """Score files across a process pool, writing each record to output as it completes"""
+    workers = workers or os.cpu_count() or 1
+    # Bound in-flight work so memory stays flat however many files are queued
+    max_pending = max_pending or workers * 4
+    total = len(files)
+    done = 0
+    started = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        queue = iter(files)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                path = next(queue, None)
+                if path is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(screen_file, path, role_name, role_info))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                output.write(json.dumps(future.result()) + '\n')
+                done += 1
+            output.flush()
+            report_progress(done, total, started)
+
+    if total:
+        print(file=sys.stderr)
+    return done
+
+
+def run_ai_batch(files, role_name, role_info, args):
+    """Run the AI analysis over files, checkpointing to SQLite, then export the job to args.output"""
+    from utils.ai_resume_analyzer import AIResumeAnalyzer
+    from utils.bulk_ai_runner import BulkAICheckpoint, BulkAIRunner
+    from utils.local_scoring_model import get_example_writer
+
+    checkpoint = BulkAICheckpoint(args.job_db)
+    job_id = args.job_id or f"{role_name}|{args.model}|{os.path.abspath(args.output)}"
+    if not args.resume:
+        checkpoint.clear(job_id)
+    runner = BulkAIRunner(
+        AIResumeAnalyzer(), checkpoint, job_id, role_name, role_info, model=args.model,
+        concurrency=args.concurrency, max_retries=args.max_retries, pack_size=args.pack
+    )
+    completed = checkpoint.completed(job_id)
+    if args.resume:
+        print(f"Resuming job {job_id}: {len(completed)} already analyzed", file=sys.stderr)
+    # Keep every training example for the local model: wait for the writer instead of dropping
+    writer = get_example_writer()
+    writer.block = True
+    count = runner.run(files, progress=report_progress)
+    if files:
+        print(file=sys.stderr)
+    if writer.pending():
+        print(f"Saving {writer.pending()} training examples for the local model...", file=sys.stderr)
+    writer.join()
+
+    with open(args.output, 'w', encoding='utf-8') as output:
+        for record in checkpoint.results(job_id):
+            output.write(json.dumps(record) + '\n')
+    return count
+
+
+def main():
+    """Parse arguments and run the batch screening"""
+    parser = argparse.ArgumentParser(description="Score PDF/DOCX resumes against a job role in bulk.")
+    parser.add_argument('inputs', nargs='+', help="Resume files and/or directories to scan")
+    parser.add_argument('--role', required=True,
+                        help="Job role name from config/job_roles.py, or 'all' to rank every role")
+    parser.add_argument('-o', '--output', default='screening_results.jsonl', help="JSONL results file")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="Maximum resumes in flight at once (default: 4 x workers)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip files already present in the output file (or AI checkpoint) and append to it")
+    parser.add_argument('--ai', action='store_true', help="Run the AI analysis instead of the keyword screen")
+    parser.add_argument('--model', default="Google Gemini",
+                        help="AI model for --ai: 'Google Gemini', 'OpenAI GPT-4', 'Custom Model' or 'Local Model'")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent AI requests for --ai")
+    parser.add_argument('--max-retries', type=int, default=5, help="Retries per resume on HTTP 429/5xx for --ai")
+    parser.add_argument('--pack', type=int, default=1,
+                        help="Score up to N resumes per AI request for --ai (scores, strengths and weaknesses only)")
+    parser.add_argument('--job-id', default=None, help="Checkpoint job id for --ai (default: role, model and output)")
+    parser.add_argument('--job-db', default='resume_data.db', help="SQLite checkpoint database for --ai")
+    args = parser.parse_args()
+
+    if args.role.lower() == 'all':
+        role_name, role_info = 'all', None
+    else:
+        _, role_name, role_info = find_role(args.role)
+    files = collect_files(args.inputs)
+
+    if args.ai:
+        if role_info is None:
+            raise SystemExit("--ai needs a specific --role, not 'all'")
+        count = run_ai_batch(files, role_name, role_info, args)
+        print(f"Analyzed {count} resumes for {role_name} with {args.model} -> {args.output}", file=sys.stderr)
+        return
+
+    mode = 'w'
+    if args.resume:
+        trim_partial_line(args.output)
+        done = load_checkpoint(args.output)
+        files = [f for f in files if f not in done]
+        mode = 'a'
+        print(f"Resuming: {len(done)} already screened, {len(files)} remaining", file=sys.stderr)
+
+    with open(args.output, mode, encoding='utf-8') as output:
+        count = run_batch(files, role_name, role_info, output, args.workers, args.max_pending)
+    print(f"Screened {count} resumes for {role_name} -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,13 @@ from config.database import (
     delete_feedback,
     log_admin_action
 )
+from utils.gemini_models import get_model_registry
+from utils.analysis_cache import get_analysis_cache
+from utils.prompt_compaction import get_compaction_stats
+from utils.single_flight import get_llm_single_flight
+from utils.rate_limiter import guard_stats
+from utils.hedging import HEDGE_ENABLED, get_hedger
+from utils.model_cascade import CASCADE_ENABLED, get_cascade_stats
 
 def admin_dashboard():
     """
@@ -88,6 +95,70 @@ def admin_dashboard():
         st.title("⚙️ Settings")
         st.write("Add admin-only configuration here (e.g. add admin).")
 
+        st.subheader("Gemini Model")
+        if st.button("Refresh Gemini model list"):
+            try:
+                model_name = get_model_registry().refresh()
+                log_admin_action(admin_email, "refresh_gemini_models")
+                if model_name:
+                    st.success(f"Using {model_name}")
+                else:
+                    st.warning("No supported Gemini model is available for this API key.")
+            except Exception as e:
+                st.error(f"Model refresh failed: {e}")
+
+        st.subheader("AI Analysis Cache")
+        analysis_cache = get_analysis_cache()
+        cache_stats = analysis_cache.stats()
+        st.write(f"{cache_stats['entries']} of {cache_stats['max_entries']} cached analyses "
+                 f"({cache_stats['hits']} hits, {cache_stats['misses']} misses since startup)")
+        purge_role = st.text_input("Only purge this job role (leave empty for all)", key="purge_cache_role")
+        if st.button("Purge AI analysis cache"):
+            removed = analysis_cache.purge(job_role=purge_role.strip() or None)
+            log_admin_action(admin_email, "purge_analysis_cache")
+            st.success(f"Removed {removed} cached analyses")
+
+        st.subheader("AI Prompt Size")
+        compaction = get_compaction_stats()
+        if compaction['requests']:
+            saved = compaction['original_tokens'] - compaction['compacted_tokens']
+            st.write(f"{compaction['requests']} prompts since startup: ~{compaction['original_tokens']} resume tokens "
+                     f"compacted to ~{compaction['compacted_tokens']} ({saved} saved), "
+                     f"{compaction['truncated']} trimmed to the token budget")
+        else:
+            st.write("No AI prompts sent since startup.")
+        flight = get_llm_single_flight().stats()
+        st.write(f"{flight['executed']} LLM calls made, {flight['coalesced']} duplicate requests "
+                 f"coalesced onto an in-flight call, {flight['in_flight']} running now")
+
+        st.subheader("AI Rate Limits")
+        guards = guard_stats()
+        if guards:
+            for name, stats in guards.items():
+                st.write(f"{name}: circuit {stats['state'].replace('_', '-')}, "
+                         f"{stats['rate_per_minute']}/{stats['max_rate_per_minute']} requests per minute, "
+                         f"{stats['throttled']} throttled (429), {stats['trips']} circuit trips, "
+                         f"{stats['rejected']} requests failed fast")
+        else:
+            st.write("No AI provider calls since startup.")
+
+        if HEDGE_ENABLED:
+            hedging = get_hedger().stats()
+            st.write(f"Hedged requests: {hedging['hedged']} of {hedging['calls']} calls "
+                     f"({hedging['hedge_rate']:.1%}); hedge won {hedging['hedge_wins']}, "
+                     f"primary won {hedging['primary_wins']}")
+            for key, deadline in hedging['deadlines'].items():
+                st.write(f"{key}: hedge after {deadline}s")
+
+        if CASCADE_ENABLED:
+            cascade = get_cascade_stats()
+            st.write(f"Model cascade: {cascade['escalated_runs']} of {cascade['runs']} analyses escalated "
+                     f"({cascade['escalation_rate']:.1%}); answered by "
+                     + (', '.join(f"{name} {count}" for name, count in cascade['answered_by'].items()) or "none yet"))
+            if cascade['reasons']:
+                top = sorted(cascade['reasons'].items(), key=lambda item: -item[1])[:5]
+                st.write("Top escalation reasons: " + ', '.join(f"{reason} ({count})" for reason, count in top))
+
     elif menu == "Logout":
         # log the logout action
         admin_email = st.session_state.get("admin_email", "admin")
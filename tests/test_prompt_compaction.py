@@ -0,0 +1,41 @@
+from utils.prompt_compaction import compact_resume_text
+from utils.text_extraction import normalize_text, strip_page_furniture
+
+PAGE_ONE = """Jane Doe | jane@example.com
+Experience
+Software Engineer
+Acme Corp, 2021 - Present
+Remote
+Built the billing service.
+Software Engineer
+Globex, 2019 - 2021
+Remote
+Page 1 of 2"""
+
+PAGE_TWO = """Jane Doe | jane@example.com
+Software Engineer
+Initech, 2017 - 2019
+Remote
+Maintained the reporting pipeline.
+Education
+BSc Computer Science
+Page 2 of 2"""
+
+
+def test_repeated_job_title_survives_compaction():
+    text = normalize_text(strip_page_furniture([PAGE_ONE, PAGE_TWO]))
+    compacted, _ = compact_resume_text(text, max_tokens=0)
+    lines = compacted.split('\n')
+    assert lines.count("Software Engineer") == 3
+    assert lines.count("Remote") == 3
+    assert "Acme Corp, 2021 - Present" in lines
+    assert "Initech, 2017 - 2019" in lines
+
+
+def test_header_repeated_at_page_top_is_kept_once():
+    text = normalize_text(strip_page_furniture([PAGE_ONE, PAGE_TWO]))
+    assert text.split('\n').count("Jane Doe | jane@example.com") == 1
+
+
+def test_single_page_is_untouched():
+    assert strip_page_furniture([PAGE_ONE]) == [PAGE_ONE]
@@ -0,0 +1,219 @@
+"""
+Shared background executor for AI resume analyses
+
+LLM calls take seconds, so running them on the Streamlit script thread ties
+the session up for the whole request. The executor runs them on a bounded
+thread pool shared by every session: the UI submits a job, stores the job id
+in session state and polls until the result is ready. Jobs time out
+AI_JOB_TIMEOUT seconds after they start running (time spent queued does not
+count): a timer on the worker sets the job's cancel_event so a streamed
+call stops early. Jobs can also be cancelled (e.g. when the user navigates
+away), in which case their result is discarded.
+"""
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (DONE, ERROR, TIMEOUT, CANCELLED)
+
+
+class AIJob:
+    def __init__(self, job_id, owner, timeout):
+        self.job_id = job_id
+        self.owner = owner
+        self.timeout = timeout
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        # Streaming progress: completed (title, body) sections and characters received
+        self.sections = []
+        self.chars_received = 0
+
+
+class AIAnalysisExecutor:
+    """Bounded thread pool running AI analyses off the script thread.
+
+    max_workers caps concurrent LLM calls across all sessions; max_pending
+    caps queued jobs so a traffic spike is turned away instead of piling up.
+    Finished jobs are kept for retention seconds so polling sessions can
+    collect their result.
+    """
+
+    def __init__(self, max_workers=8, max_pending=64, timeout=120, retention=600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-analysis')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, owner=None, timeout=None, with_cancel_event=False,
+               with_progress=False, **kwargs):
+        """Queue fn(*args, **kwargs) and return its job id, or None when the queue is full.
+
+        With with_cancel_event=True, fn is also passed ``cancel_event`` (set
+        on cancel or timeout) so long-running work can stop early. With
+        with_progress=True, fn is passed ``on_chunk`` and ``on_section``
+        callbacks whose output can be read with progress() while it runs.
+        """
+        with self._lock:
+            self._expire_jobs()
+            active = sum(1 for job in self._jobs.values() if job.state in (PENDING, RUNNING))
+            if active >= self.max_workers + self.max_pending:
+                return None
+            job = AIJob(uuid.uuid4().hex, owner, timeout or self.timeout)
+            self._jobs[job.job_id] = job
+        if with_cancel_event:
+            kwargs['cancel_event'] = job.cancel_event
+        if with_progress:
+            kwargs['on_chunk'] = lambda text: self._record_chunk(job, text)
+            kwargs['on_section'] = lambda title, body: self._record_section(job, title, body)
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.job_id
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job.state != PENDING:
+                return
+            job.state = RUNNING
+            job.started_at = time.monotonic()
+        # Enforce the timeout even when nobody polls the job
+        timer = threading.Timer(job.timeout, self._time_out, args=(job,))
+        timer.daemon = True
+        timer.start()
+        try:
+            result, error = fn(*args, **kwargs), None
+        except Exception as e:
+            result, error = None, str(e)
+        finally:
+            timer.cancel()
+        with self._lock:
+            # A job that timed out or was cancelled meanwhile keeps that state
+            if job.state == RUNNING:
+                job.state = ERROR if error else DONE
+                job.result, job.error = result, error
+                job.finished_at = time.monotonic()
+
+    def _record_chunk(self, job, text):
+        with self._lock:
+            job.chars_received += len(text)
+
+    def _record_section(self, job, title, body):
+        with self._lock:
+            job.sections.append((title, body))
+
+    def _time_out(self, job):
+        with self._lock:
+            self._check_timeout(job)
+
+    def _check_timeout(self, job):
+        # Caller holds the lock
+        if job.state == RUNNING and time.monotonic() - job.started_at >= job.timeout:
+            job.state = TIMEOUT
+            job.error = f"AI analysis timed out after {job.timeout:.0f} seconds"
+            job.finished_at = time.monotonic()
+            job.cancel_event.set()
+            if job.future:
+                job.future.cancel()
+
+    def status(self, job_id):
+        """Return the job's state, or None for an unknown or expired job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._check_timeout(job)
+            return job.state
+
+    def result(self, job_id):
+        """Return (state, result, error) for a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, None, "AI analysis job not found"
+            self._check_timeout(job)
+            return job.state, job.result, job.error
+
+    def progress(self, job_id):
+        """Return the sections completed so far and the number of characters received"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {'sections': [], 'chars_received': 0}
+            return {'sections': list(job.sections), 'chars_received': job.chars_received}
+
+    def elapsed(self, job_id):
+        """Seconds since the job was submitted"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return time.monotonic() - job.submitted_at if job else 0
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; a running LLM call finishes but its result is dropped"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            job.state = CANCELLED
+            job.finished_at = time.monotonic()
+            job.cancel_event.set()
+            if job.future:
+                job.future.cancel()
+            return True
+
+    def cancel_owner(self, owner):
+        """Cancel every unfinished job submitted by owner (a session id)"""
+        with self._lock:
+            job_ids = [job.job_id for job in self._jobs.values()
+                       if job.owner == owner and job.state not in FINISHED_STATES]
+        return sum(1 for job_id in job_ids if self.cancel(job_id))
+
+    def stats(self):
+        """Return job counts by state"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return counts
+
+    def _expire_jobs(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        for job in self._jobs.values():
+            self._check_timeout(job)
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_ai_executor = None
+_ai_executor_lock = threading.Lock()
+
+
+def get_ai_executor():
+    """Return the process-wide AI analysis executor, configured from the environment"""
+    global _ai_executor
+    with _ai_executor_lock:
+        if _ai_executor is None:
+            _ai_executor = AIAnalysisExecutor(
+                max_workers=int(os.getenv("AI_MAX_CONCURRENCY", "8")),
+                max_pending=int(os.getenv("AI_MAX_PENDING", "64")),
+                timeout=float(os.getenv("AI_JOB_TIMEOUT", "120"))
+            )
+        return _ai_executor
@@ -1,15 +1,11 @@
 import os
 import re
-import tempfile
 import json
 import math
 import requests
 import streamlit as st
 from dotenv import load_dotenv
 import google.generativeai as genai
-import pdfplumber
-from pdf2image import convert_from_path
-import pytesseract
 # ReportLab imports for PDF generation
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
@@ -18,33 +14,127 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.graphics.shapes import Drawing, Rect, String, Line
 import io
+import hashlib
 import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .text_extraction import extract_text
+from .gemini_models import get_model_registry
+from .llm_providers import get_provider
+from .single_flight import Cancelled, get_llm_single_flight
+from .rate_limiter import CircuitOpenError, RateLimitExceeded, get_llm_guard
+from .hedging import HEDGE_ENABLED, HEDGE_MODELS, get_hedger
+from .model_cascade import cascade_tiers, record_cascade
+from .resume_analyzer import ResumeAnalyzer
+from .local_scoring_model import LOCAL_MODEL_LABEL, extract_features, get_local_model, record_example
+from .analysis_cache import get_analysis_cache
+from .prompt_compaction import PROMPT_TOKEN_BUDGET, compact_resume_text, estimate_tokens
+from .analysis_parser import (
+    SectionStreamer, JSON_SCHEMA_PROMPT, clean_markdown, parse_analysis, parse_analysis_json, to_markdown,
+    validate_analysis, split_sections, build_analysis, section_key, SECTION_KEYS, PACKED_SCHEMA_PROMPT,
+    parse_packed_scores
+)
+
+# Bump whenever the analysis prompt or result structure changes so cached results are not reused
+PROMPT_VERSION = 4
+# "markdown" (streamable "## " sections) or "json" (structured output from the model)
+AI_RESPONSE_FORMAT = os.getenv("AI_RESPONSE_FORMAT", "markdown").lower()
+# Ask for groups of sections in parallel sub-prompts instead of one long generation
+AI_FANOUT_ENABLED = os.getenv("AI_FANOUT_ENABLED", "false").lower() == "true"
+if AI_FANOUT_ENABLED and AI_RESPONSE_FORMAT == "json":
+    # Sub-prompt answers are merged section by section, which needs markdown
+    print("AI_FANOUT_ENABLED is set, so AI_RESPONSE_FORMAT=json is ignored and fan-out uses markdown")
+
+PROMPT_INTRO = (
+    "You are an expert resume analyst with deep knowledge of industry standards, job requirements, and hiring "
+    "practices across various fields. Your task is to provide a comprehensive, detailed analysis of the resume provided."
+)
+# (heading, instruction) for each section of the analysis, in report order
+ANALYSIS_SECTIONS = [
+    ("Overall Assessment",
+     "[Provide a detailed assessment of the resume's overall quality, effectiveness, and alignment with industry "
+     "standards. Include specific observations about formatting, content organization, and general impression. "
+     "Be thorough and specific.]"),
+    ("Professional Profile Analysis",
+     "[Analyze the candidate's professional profile, experience trajectory, and career narrative. Discuss how well "
+     "their story comes across and whether their career progression makes sense for their apparent goals.]"),
+    ("Skills Analysis",
+     "- **Current Skills**: [List ALL skills the candidate demonstrates in their resume, categorized by type "
+     "(technical, soft, domain-specific, etc.). Be comprehensive.]\n"
+     "- **Skill Proficiency**: [Assess the apparent level of expertise in key skills based on how they're presented "
+     "in the resume]\n"
+     "- **Missing Skills**: [List important skills that would improve the resume for their target role. Be specific "
+     "and explain why each skill matters.]"),
+    ("Experience Analysis",
+     "[Provide detailed feedback on how well the candidate has presented their experience. Analyze the use of action "
+     "verbs, quantifiable achievements, and relevance to their target role. Suggest specific improvements.]"),
+    ("Education Analysis",
+     "[Analyze the education section, including relevance of degrees, certifications, and any missing educational "
+     "elements that would strengthen their profile.]"),
+    ("Key Strengths",
+     "[List 5-7 specific strengths of the resume with detailed explanations of why these are effective]"),
+    ("Areas for Improvement",
+     "[List 5-7 specific areas where the resume could be improved with detailed, actionable recommendations]"),
+    ("ATS Optimization Assessment",
+     "[Analyze how well the resume is optimized for Applicant Tracking Systems. Provide a specific ATS score from "
+     "0-100, with 100 being perfectly optimized. Use this format: \"ATS Score: XX/100\". Then suggest specific "
+     "keywords and formatting changes to improve ATS performance.]"),
+    ("Recommended Courses/Certifications",
+     "[Suggest 5-7 specific courses or certifications that would enhance the candidate's profile, with a brief "
+     "explanation of why each would be valuable]"),
+    ("Resume Score",
+     "[Provide a score from 0-100 based on the overall quality of the resume. Use this format exactly: \"Resume "
+     "Score: XX/100\" where XX is the numerical score. Be consistent with your assessment - a resume with "
+     "significant issues should score below 60, an average resume 60-75, a good resume 75-85, and an excellent "
+     "resume 85-100.]"),
+]
+ROLE_SECTION = (
+    "Role Alignment Analysis",
+    "[Analyze how well the resume aligns with the target role of {job_role}. Provide specific recommendations to "
+    "better align the resume with this role.]"
+)
+JOB_SECTIONS = [
+    ("Job Match Analysis",
+     "[Provide a detailed analysis of how well the resume matches the job description, with a match percentage and "
+     "specific areas of alignment and misalignment]"),
+    ("Key Job Requirements Not Met",
+     "[List specific requirements from the job description that are not addressed in the resume, with "
+     "recommendations on how to address each gap]"),
+]
+# Packed bulk scoring: per-request and per-resume token budgets
+PACK_TOKEN_BUDGET = int(os.getenv("AI_PACK_TOKEN_BUDGET", "8000"))
+PACK_RESUME_TOKENS = int(os.getenv("AI_PACK_RESUME_TOKENS", "1200"))
+# Sections requested together by each sub-prompt in fan-out mode; similar output lengths per group
+FANOUT_GROUPS = [
+    ("Overall Assessment", "Professional Profile Analysis", "Education Analysis"),
+    ("Skills Analysis", "Experience Analysis", "Key Strengths", "Areas for Improvement"),
+    ("ATS Optimization Assessment", "Recommended Courses/Certifications", "Resume Score"),
+    ("Role Alignment Analysis", "Job Match Analysis", "Key Job Requirements Not Met"),
+]
+# Serve the keyword-based ATS score while the AI provider is throttled or down
+AI_HEURISTIC_FALLBACK = os.getenv("AI_HEURISTIC_FALLBACK", "true").lower() == "true"
 
 
 class AIResumeAnalyzer:
-    def analyze_resume(self, resume_text, job_role=None, role_info=None, model="Google Gemini"):
+    def analyze_resume(self, resume_text, job_role=None, role_info=None, model="Google Gemini",
+                       on_chunk=None, on_section=None, cancel_event=None, allow_fallback=True, heuristic=None):
         """
         Analyze a resume using the specified AI model
         Parameters:
         - resume_text: The text content of the resume
         - job_role: The target job role
         - role_info: Additional information about the job role
-        - model: The AI model to use ("Google Gemini" or "Anthropic Claude")
+        - model: The AI model to use ("Google Gemini", "OpenAI GPT-4" or "Custom Model", see llm_providers)
+        - on_chunk: Optional callback(text) for each streamed text chunk
+        - on_section: Optional callback(title, body) fired as each "## " section completes
+        - cancel_event: Optional threading.Event that stops a streamed response early
+        - allow_fallback: Return the heuristic analysis instead of an error while the provider is
+          rate limited or its circuit is open (see AI_HEURISTIC_FALLBACK)
+        - heuristic: The ResumeAnalyzer result for the same text and role, if the caller already has it
         Returns:
         - Dictionary containing analysis results
         """
         import traceback
-        def clean_markdown(text):
-            if not text:
-                return ""
-            import re
-            text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-            text = re.sub(r'\*(.*?)\*', r'\1', text)
-            text = re.sub(r'__(.*?)__', r'\1', text)
-            text = re.sub(r'_(.*?)_', r'\1', text)
-            text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-            text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-            return text.strip()
+        json_mode = AI_RESPONSE_FORMAT == "json" and not AI_FANOUT_ENABLED
         try:
             # print("[DEBUG] First 500 chars of resume_text:", (resume_text[:500] if resume_text else "<EMPTY>"))
             job_description = None
@@ -54,145 +144,65 @@ class AIResumeAnalyzer:
                 Description: {role_info.get('description', '')}
                 Required Skills: {', '.join(role_info.get('required_skills', []))}
                 """
-            # Choose the appropriate model for analysis
-            if model == "Google Gemini":
-                # Use gemini-1.5-flash for best results
-                if not self.google_api_key:
-                    return {"error": "Google API key is not configured. Please add it to your .env file."}
-                try:
-                    # Explicitly list available models and use the correct one
-                    available_models = [m.name for m in genai.list_models()]
-                    if "models/gemini-2.5-flash" in available_models:
-                        model_gemini = genai.GenerativeModel("gemini-2.5-flash")
-                    elif "models/gemini-2.5-pro" in available_models:
-                        model_gemini = genai.GenerativeModel("gemini-2.5-pro")
-                    elif "models/gemini-pro-latest" in available_models:
-                        model_gemini = genai.GenerativeModel("gemini-pro-latest")
-                    elif "models/gemini-1.5-flash" in available_models:
-                        model_gemini = genai.GenerativeModel("gemini-1.5-flash")
-                    elif "models/gemini-pro" in available_models:
-                        model_gemini = genai.GenerativeModel("gemini-pro")
-                    else:
-                        return {"error": "Gemini model not available in your API key/account. Please check your Google AI Studio access."}
-                    base_prompt = f"""
-                    You are an expert resume analyst with deep knowledge of industry standards, job requirements, and hiring practices across various fields. Your task is to provide a comprehensive, detailed analysis of the resume provided.
-                    Please structure your response in the following format:
-                    ## Overall Assessment
-                    [Provide a detailed assessment of the resume's overall quality, effectiveness, and alignment with industry standards. Include specific observations about formatting, content organization, and general impression. Be thorough and specific.]
-                    ## Professional Profile Analysis
-                    [Analyze the candidate's professional profile, experience trajectory, and career narrative. Discuss how well their story comes across and whether their career progression makes sense for their apparent goals.]
-                    ## Skills Analysis
-                    - **Current Skills**: [List ALL skills the candidate demonstrates in their resume, categorized by type (technical, soft, domain-specific, etc.). Be comprehensive.]
-                    - **Skill Proficiency**: [Assess the apparent level of expertise in key skills based on how they're presented in the resume]
-                    - **Missing Skills**: [List important skills that would improve the resume for their target role. Be specific and explain why each skill matters.]
-                    ## Experience Analysis
-                    [Provide detailed feedback on how well the candidate has presented their experience. Analyze the use of action verbs, quantifiable achievements, and relevance to their target role. Suggest specific improvements.]
-                    ## Education Analysis
-                    [Analyze the education section, including relevance of degrees, certifications, and any missing educational elements that would strengthen their profile.]
-                    ## Key Strengths
-                    [List 5-7 specific strengths of the resume with detailed explanations of why these are effective]
-                    ## Areas for Improvement
-                    [List 5-7 specific areas where the resume could be improved with detailed, actionable recommendations]
-                    ## ATS Optimization Assessment
-                    [Analyze how well the resume is optimized for Applicant Tracking Systems. Provide a specific ATS score from 0-100, with 100 being perfectly optimized. Use this format: "ATS Score: XX/100". Then suggest specific keywords and formatting changes to improve ATS performance.]
-                    ## Recommended Courses/Certifications
-                    [Suggest 5-7 specific courses or certifications that would enhance the candidate's profile, with a brief explanation of why each would be valuable]
-                    ## Resume Score
-                    [Provide a score from 0-100 based on the overall quality of the resume. Use this format exactly: "Resume Score: XX/100" where XX is the numerical score. Be consistent with your assessment - a resume with significant issues should score below 60, an average resume 60-75, a good resume 75-85, and an excellent resume 85-100.]
-                    Resume:
-                    {resume_text}
-                    """
-                    if job_role:
-                        base_prompt += f"""
-                        The candidate is targeting a role as: {job_role}
-                        ## Role Alignment Analysis
-                        [Analyze how well the resume aligns with the target role of {job_role}. Provide specific recommendations to better align the resume with this role.]
-                        """
-                    if job_description:
-                        base_prompt += f"""
-                        Additionally, compare this resume to the following job description:
-                        Job Description:
-                        {job_description}
-                        ## Job Match Analysis
-                        [Provide a detailed analysis of how well the resume matches the job description, with a match percentage and specific areas of alignment and misalignment]
-                        ## Key Job Requirements Not Met
-                        [List specific requirements from the job description that are not addressed in the resume, with recommendations on how to address each gap]
-                        """
-                    response = model_gemini.generate_content(base_prompt)
-                    # print("Gemini raw response:", response)
-                    if hasattr(response, "text"):
-                        # print("Gemini response.text:", response.text)
-                        pass
-                    analysis = response.text.strip() if hasattr(response, "text") else str(response)
-                    model_used = "Google Gemini (gemini-1.5-flash)"
-                except Exception as e:
-                    # print(f"Gemini API Exception: {e}")
-                    return {"error": f"Analysis failed: {str(e)}"}
-            elif model == "Anthropic Claude":
+            if model == "Anthropic Claude":
                 # Placeholder for Anthropic Claude logic
                 return {"error": "Anthropic Claude integration not implemented in this version."}
-            else:
+            if model == LOCAL_MODEL_LABEL:
+                return self.local_analysis(resume_text, role_info)
+            provider = get_provider(model)
+            if provider is None:
                 return {"error": "Unknown model selected."}
-            # Extract strengths
-            strengths = []
-            if "## Key Strengths" in analysis:
-                strengths_section = analysis.split("## Key Strengths")[1].split("##")[0].strip()
-                strengths = [clean_markdown(s.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                            for s in strengths_section.split("\n") 
-                            if s.strip() and (s.strip().startswith("-") or s.strip().startswith("*") or s.strip().startswith("•"))]
-            # Extract weaknesses/areas for improvement
-            weaknesses = []
-            if "## Areas for Improvement" in analysis:
-                weaknesses_section = analysis.split("## Areas for Improvement")[1].split("##")[0].strip()
-                weaknesses = [clean_markdown(w.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                             for w in weaknesses_section.split("\n") 
-                             if w.strip() and (w.strip().startswith("-") or w.strip().startswith("*") or w.strip().startswith("•"))]
-            # Extract suggestions/recommendations
-            suggestions = []
-            if "## Recommended Courses" in analysis:
-                suggestions_section = analysis.split("## Recommended Courses")[1].split("##")[0].strip()
-                suggestions = [clean_markdown(s.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                                 for s in suggestions_section.split("\n") 
-                                 if s.strip() and (s.strip().startswith("-") or s.strip().startswith("*") or s.strip().startswith("•"))]
-            # Extract score
-            def extract_score_from_text(analysis_text):
-                import re
-                if "## Resume Score" in analysis_text:
-                    score_section = analysis_text.split("## Resume Score")[1].strip()
-                    score_match = re.search(r'Resume Score:\s*(\d{1,3})/100', score_section)
-                    if score_match:
-                        score = int(score_match.group(1))
-                        return max(0, min(score, 100))
-                    score_match = re.search(r'\b(\d{1,3})\b', score_section)
-                    if score_match:
-                        score = int(score_match.group(1))
-                        return max(0, min(score, 100))
-                score_match = re.search(r'Resume Score:\s*(\d{1,3})/100', analysis_text)
-                if score_match:
-                    score = int(score_match.group(1))
-                    return max(0, min(score, 100))
-                return 0
-            score = extract_score_from_text(analysis)
-            # Extract ATS score
-            def extract_ats_score_from_text(analysis_text):
-                import re
-                if "## ATS Optimization Assessment" in analysis_text:
-                    ats_section = analysis_text.split("## ATS Optimization Assessment")[1].split("##")[0].strip()
-                    score_match = re.search(r'ATS Score:\s*(\d{1,3})/100', ats_section)
-                    if score_match:
-                        score = int(score_match.group(1))
-                        return max(0, min(score, 100))
-                return 0
-            ats_score = extract_ats_score_from_text(analysis)
-            return {
-                "score": score,
-                "ats_score": ats_score,
-                "strengths": strengths,
-                "weaknesses": weaknesses,
-                "suggestions": suggestions,
-                "full_response": analysis,
-                "model_used": model_used
-            }
+            if not provider.is_configured():
+                return {"error": provider.missing_config_message}
+            try:
+                model_name = provider.resolve_model()
+                if not model_name:
+                    return {"error": f"{provider.label} model not available for your API key/account. Please check your provider access."}
+                model_used = f"{provider.label} ({model_name})"
+                tiers = cascade_tiers(provider)
+                if tiers:
+                    model_used = f"{provider.label} (cascade: {' > '.join(name for name, _ in tiers)})"
+                # Identical resume + role + model + prompt: answer from the cache
+                cache = get_analysis_cache()
+                prompt_version = f"{PROMPT_VERSION}-{AI_RESPONSE_FORMAT}-{PROMPT_TOKEN_BUDGET}"
+                if AI_FANOUT_ENABLED:
+                    prompt_version += "-fanout"
+                cache_key = cache.make_key(resume_text, job_role, model_used, prompt_version, job_description)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    cached["cached"] = True
+                    return cached
+                # Strip page furniture and whitespace, and hold the resume to the token budget
+                prompt_resume_text, prompt_stats = compact_resume_text(resume_text)
+                prompts = self.build_prompts(prompt_resume_text, job_role, job_description, json_mode)
+                prompt_stats["prompt_tokens"] = sum(estimate_tokens(prompt) for prompt in prompts)
+                if tiers:
+                    analysis, parsed, model_used = self._run_cascade(
+                        tiers, prompts, json_mode, on_chunk, on_section, cancel_event
+                    )
+                else:
+                    analysis, parsed = self._run_model(
+                        provider, model_used, prompts, json_mode, on_chunk, on_section, cancel_event
+                    )
+            except (CircuitOpenError, RateLimitExceeded) as e:
+                if allow_fallback and AI_HEURISTIC_FALLBACK:
+                    return self.heuristic_analysis(resume_text, role_info, str(e), heuristic)
+                return {"error": f"Analysis failed: {str(e)}", "status_code": e.status_code}
+            except Exception as e:
+                # print(f"{model} API Exception: {e}")
+                # status_code (e.g. 429, 503) lets callers decide whether a retry makes sense
+                return {"error": f"Analysis failed: {str(e)}", "status_code": getattr(e, "status_code", None)}
+            result = dict(parsed, full_response=analysis, model_used=model_used, prompt_stats=prompt_stats)
+            problems = validate_analysis(parsed)
+            if problems:
+                # Empty, blocked or truncated answers are shown once but never served from the cache
+                print(f"Not caching analysis from {model_used}: {', '.join(problems)}")
+            else:
+                cache.put(cache_key, result, job_role=job_role, model=model_used, prompt_version=prompt_version)
+            # Every AI-scored resume is a training example for the local scoring model
+            record_example(resume_text, role_info, result.get("score"), result.get("ats_score"), job_role, model_used,
+                           heuristic)
+            return result
         except Exception as e:
             # print(f"Error in analyze_resume: {str(e)}")
             # print(traceback.format_exc())
@@ -206,21 +216,306 @@ class AIResumeAnalyzer:
                 "full_response": f"Error: {str(e)}",
                 "model_used": "Error"
             }
+    def build_prompts(self, resume_text, job_role=None, job_description=None, json_mode=False):
+        """Return the analysis prompt, or one sub-prompt per section group in fan-out mode"""
+        sections = list(ANALYSIS_SECTIONS)
+        context = ""
+        if job_role:
+            sections.append((ROLE_SECTION[0], ROLE_SECTION[1].format(job_role=job_role)))
+            context += f"\nThe candidate is targeting a role as: {job_role}\n"
+        if job_description:
+            sections.extend(JOB_SECTIONS)
+            context += f"\nCompare this resume to the following job description:\n{job_description}\n"
+        if not AI_FANOUT_ENABLED:
+            prompt = self._format_prompt(sections, resume_text, context)
+            return [prompt + JSON_SCHEMA_PROMPT if json_mode else prompt]
+        # Sub-prompts always use markdown sections so their answers can be merged section by section
+        instructions = dict(sections)
+        prompts = []
+        for group in FANOUT_GROUPS:
+            group_sections = [(heading, instructions[heading]) for heading in group if heading in instructions]
+            if group_sections:
+                prompts.append(self._format_prompt(group_sections, resume_text, context, only=True))
+        return prompts
+
+    def _format_prompt(self, sections, resume_text, context="", only=False):
+        fmt = '\n'.join(f"## {heading}\n{instruction}" for heading, instruction in sections)
+        scope = " Write only these sections, nothing else." if only else ""
+        return (f"{PROMPT_INTRO}\nPlease structure your response in the following format.{scope}\n{fmt}\n"
+                f"Resume:\n{resume_text}\n{context}")
+
+    def _call(self, provider, model_used, prompt, json_mode=False, on_chunk=None, on_section=None, cancel_event=None):
+        """Return (text, streamed_sections or None) for one prompt"""
+        # Identical prompts already in flight (other tabs, Streamlit reruns) share one call
+        flight_key = hashlib.sha256(
+            f"{model_used}\x1f{json_mode}\x1f{prompt}".encode("utf-8")
+        ).hexdigest()
+        return get_llm_single_flight().do(
+            flight_key,
+            lambda: self._generate(provider, prompt, json_mode, on_chunk, on_section, cancel_event),
+            cancel_event
+        )
+
+    def _run_model(self, provider, model_used, prompts, json_mode=False, on_chunk=None, on_section=None,
+                   cancel_event=None):
+        """Send the prompt (or fan-out sub-prompts) to one model and return (markdown_text, parsed_analysis)"""
+        if len(prompts) > 1:
+            return self._run_fanout(provider, model_used, prompts, on_chunk, on_section, cancel_event)
+        analysis, streamed_sections = self._call(
+            provider, model_used, prompts[0], json_mode, on_chunk, on_section, cancel_event
+        )
+        # Parse the response once; the UI and the PDF report both read the parsed sections
+        if json_mode:
+            try:
+                parsed = parse_analysis_json(analysis)
+                return to_markdown(parsed["sections"]), parsed
+            except ValueError:
+                # The model ignored the JSON format; re-split its text with the markdown parser
+                return analysis, parse_analysis(analysis)
+        return analysis, parse_analysis(analysis, streamed_sections)
+
+    def _run_fanout(self, provider, model_used, prompts, on_chunk=None, on_section=None, cancel_event=None):
+        """Send sub-prompts concurrently and merge their sections into one analysis.
+
+        Sub-prompts do not stream: each answer is buffered and reported to
+        on_chunk/on_section from this thread as a whole once it completes, so
+        sections from different sub-prompts never interleave.
+        """
+        order = {key: index for index, (_, key) in enumerate(SECTION_KEYS)}
+        sections = []
+        with ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix='ai-fanout') as pool:
+            futures = [
+                pool.submit(self._call, provider, model_used, prompt, False, None, None, cancel_event)
+                for prompt in prompts
+            ]
+            for future in as_completed(futures):
+                text, _ = future.result()
+                answer_sections = split_sections(text)
+                answer_sections.sort(key=lambda section: order.get(section_key(section[0]), len(order)))
+                if on_chunk:
+                    on_chunk(text)
+                if on_section:
+                    for title, body in answer_sections:
+                        on_section(title, body)
+                sections.extend(answer_sections)
+        # Report order, whatever order the sub-requests finished in
+        sections.sort(key=lambda section: order.get(section_key(section[0]), len(order)))
+        analysis = to_markdown([{'title': title, 'body': body} for title, body in sections])
+        return analysis, build_analysis(sections, analysis)
+
+    def _run_cascade(self, tiers, prompts, json_mode=False, on_chunk=None, on_section=None, cancel_event=None):
+        """Try the cascade's models fastest first; return (text, parsed, model_used) of the first usable answer"""
+        escalations = []
+        for index, (model_name, tier) in enumerate(tiers):
+            last = index == len(tiers) - 1
+            model_used = f"{tier.label} ({model_name})"
+            # Only the first model streams into the UI; an escalated answer replaces it when it is done
+            first = index == 0
+            try:
+                analysis, parsed = self._run_model(
+                    tier, model_used, prompts, json_mode,
+                    on_chunk if first else None, on_section if first else None, cancel_event
+                )
+            except (Cancelled, CircuitOpenError, RateLimitExceeded):
+                raise
+            except Exception as e:
+                if last:
+                    raise
+                escalations.append((model_name, [f"error: {e}"]))
+                continue
+            problems = validate_analysis(parsed)
+            if problems and not last:
+                escalations.append((model_name, problems))
+                continue
+            record_cascade(model_name, escalations)
+            parsed["cascade"] = {
+                "answered_by": model_name,
+                "escalations": [{"model": name, "problems": problems} for name, problems in escalations],
+            }
+            return analysis, parsed, model_used
+
+    def _generate(self, provider, prompt, json_mode=False, on_chunk=None, on_section=None, cancel_event=None):
+        """Return (response_text, streamed_sections or None) for one LLM call"""
+        # Shared per-provider rate limit and circuit breaker
+        guard = get_llm_guard(provider.label)
+        streaming = bool(on_chunk or on_section or cancel_event)
+
+        def attempt(target, attempt_cancel=cancel_event, claim=None):
+            if streaming:
+                return guard.call(lambda: self.stream_analysis(
+                    target, prompt, on_chunk, on_section, attempt_cancel, json_mode, claim
+                ))
+            text = guard.call(lambda: target.generate(prompt, json_mode=json_mode).strip())
+            if claim is not None and not claim():
+                raise Cancelled("Hedged request lost to a faster one")
+            return text, None
+
+        if not HEDGE_ENABLED:
+            return attempt(provider)
+        # A second request goes out if this one is slower than the recent tail latency
+        hedge_model = HEDGE_MODELS.get(provider.label)
+        hedge_provider = provider.with_model(hedge_model) if hedge_model else provider
+        return get_hedger().run(
+            f"{provider.label}:{'stream' if streaming else 'generate'}",
+            lambda cancel, claim: attempt(provider, cancel, claim),
+            lambda cancel, claim: attempt(hedge_provider, cancel, claim),
+            cancel_event
+        )
+
+    def heuristic_analysis(self, resume_text, role_info=None, reason=None, heuristic=None):
+        """Build an AI-shaped result from the keyword-based ResumeAnalyzer scores"""
+        if heuristic is None:
+            heuristic = ResumeAnalyzer().analyze_resume({'raw_text': resume_text}, role_info or {})
+        if 'error' in heuristic:
+            return {"error": f"Analysis failed: {reason or heuristic['error']}", "status_code": 503}
+        ats_score = heuristic.get('ats_score', 0)
+        overall = "AI analysis is temporarily unavailable, so this is the keyword-based ATS analysis."
+        if reason:
+            overall += f" ({reason})"
+        return dict(self._keyword_result(heuristic, overall, ats_score, ats_score),
+                    model_used="Keyword analysis (AI unavailable)", fallback=True)
+
+    def local_analysis(self, resume_text, role_info=None):
+        """Score a resume offline with the local model trained on past AI scores"""
+        model = get_local_model()
+        if model is None:
+            return {"error": "The local scoring model has not been trained yet. "
+                             "Run: python -m utils.local_scoring_model train"}
+        heuristic = ResumeAnalyzer().analyze_resume({'raw_text': resume_text}, role_info or {})
+        if 'error' in heuristic:
+            return {"error": f"Analysis failed: {heuristic['error']}"}
+        if heuristic.get('document_type') != 'resume':
+            score = ats_score = 0
+        else:
+            score, ats_score = model.predict(extract_features(heuristic, resume_text))
+        overall = (f"Scores predicted offline by the local scoring model (version {model.version}) "
+                   "from the keyword analysis; the feedback below comes from the keyword analysis.")
+        return dict(self._keyword_result(heuristic, overall, score, ats_score),
+                    model_used=f"{LOCAL_MODEL_LABEL} ({model.version})", local=True)
+
+    def _keyword_result(self, heuristic, overall, score, ats_score):
+        """AI-shaped result built from a ResumeAnalyzer result"""
+        keyword_match = heuristic.get('keyword_match', {})
+        found = list(keyword_match.get('found_skills', []))
+        missing = list(keyword_match.get('missing_skills', []))
+        return {
+            "sections": [],
+            "overall_assessment": overall,
+            "strengths": [f"Mentions {skill}" for skill in found],
+            "weaknesses": [f"No mention of {skill}" for skill in missing],
+            "suggestions": heuristic.get('suggestions', []),
+            "current_skills": found,
+            "missing_skills": missing,
+            "score": score,
+            "resume_score": score,
+            "ats_score": ats_score,
+            "full_response": "",
+        }
+
+    def stream_analysis(self, provider, prompt, on_chunk=None, on_section=None, cancel_event=None, json_mode=False,
+                        claim=None):
+        """Stream a provider response, reporting chunks and completed sections as they arrive.
+
+        claim, when given, is called before the first chunk is reported; if it
+        returns False (a hedged request already won) the stream is abandoned.
+        Returns (full_text, sections) so the caller can parse without re-splitting the text.
+        """
+        streamer = SectionStreamer(on_section)
+        chunks = []
+        for text in provider.stream(prompt, json_mode=json_mode):
+            if cancel_event is not None and cancel_event.is_set():
+                raise Cancelled("AI analysis was cancelled")
+            if claim is not None and not chunks and not claim():
+                raise Cancelled("Hedged request lost to a faster one")
+            chunks.append(text)
+            streamer.feed(text)
+            if on_chunk:
+                on_chunk(text)
+        streamer.close()
+        return ''.join(chunks).strip(), streamer.sections
+
+    def score_resumes_packed(self, resumes, job_role=None, role_info=None, model="Google Gemini"):
+        """Score several resumes with as few requests as possible (bulk screening).
+
+        resumes maps a caller key (e.g. a file path) to resume text. Resumes
+        are compacted to PACK_RESUME_TOKENS and packed into requests of at most
+        PACK_TOKEN_BUDGET tokens that only ask for scores, strengths and
+        weaknesses. Entries a pack response gets wrong are re-sent one resume
+        per request. Returns {key: result}, where failed results carry
+        "error" and "status_code".
+        """
+        if model == LOCAL_MODEL_LABEL:
+            return {key: self.local_analysis(text, role_info) for key, text in resumes.items()}
+        provider = get_provider(model)
+        if provider is None or not provider.is_configured():
+            message = "Unknown model selected." if provider is None else provider.missing_config_message
+            return {key: {"error": message} for key in resumes}
+        try:
+            model_name = provider.resolve_model()
+        except Exception as e:
+            return {key: {"error": f"Analysis failed: {str(e)}"} for key in resumes}
+        if not model_name:
+            return {key: {"error": f"{provider.label} model not available for your API key/account."} for key in resumes}
+        model_used = f"{provider.label} ({model_name})"
+
+        context = ""
+        if job_role:
+            context += f"Target role: {job_role}\n"
+        if role_info:
+            context += f"Required skills: {', '.join(role_info.get('required_skills', []))}\n"
+        overhead = estimate_tokens(PACKED_SCHEMA_PROMPT + context) + 50
+        packs, pack, pack_tokens = [], [], overhead
+        for key, text in resumes.items():
+            text = compact_resume_text(text, PACK_RESUME_TOKENS)[0]
+            tokens = estimate_tokens(text) + 10
+            if pack and pack_tokens + tokens > PACK_TOKEN_BUDGET:
+                packs.append(pack)
+                pack, pack_tokens = [], overhead
+            pack.append((key, text))
+            pack_tokens += tokens
+        if pack:
+            packs.append(pack)
+
+        results = {}
+        for pack in packs:
+            results.update(self._score_pack(provider, model_used, pack, context))
+        for key, result in results.items():
+            if "error" not in result:
+                record_example(resumes[key], role_info, result["score"], result["ats_score"], job_role, model_used)
+        return results
+
+    def _score_pack(self, provider, model_used, pack, context):
+        """Score one pack of (key, text); entries that fail validation are retried one by one"""
+        ids = {f"R{index + 1}": key for index, (key, _) in enumerate(pack)}
+        prompt = "You are an expert resume screener. Score each resume below for the target role.\n"
+        prompt += context + PACKED_SCHEMA_PROMPT
+        for resume_id, (_, text) in zip(ids, pack):
+            prompt += f"\n=== RESUME {resume_id} ===\n{text}\n"
+        try:
+            response, _ = self._generate(provider, prompt, json_mode=True)
+            scores = parse_packed_scores(response, ids)
+        except ValueError:
+            scores = {}
+        except Exception as e:
+            # Provider errors (429, 5xx, open circuit) would hit single requests too; let the caller back off
+            error = {"error": f"Analysis failed: {str(e)}", "status_code": getattr(e, "status_code", None)}
+            return {key: dict(error) for key, _ in pack}
+
+        texts = dict(pack)
+        results = {}
+        for resume_id, key in ids.items():
+            if resume_id in scores:
+                results[key] = dict(scores[resume_id], model_used=model_used, packed=len(pack))
+            elif len(pack) > 1:
+                results.update(self._score_pack(provider, model_used, [(key, texts[key])], context))
+            else:
+                results[key] = {"error": "Analysis failed: AI response did not pass validation"}
+        return results
+
     def extract_text_from_docx(self, docx_file):
         """Extract text from DOCX file."""
         try:
-            from docx import Document
-            import tempfile
-            # Save the uploaded file to a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as temp_file:
-                temp_file.write(docx_file.getbuffer())
-                temp_path = temp_file.name
-            text = ""
-            doc = Document(temp_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-            # print("[DEBUG] First 500 chars of DOCX extracted text:", (text[:500] if text else "<EMPTY>"))
-            return text.strip()
+            return extract_text(docx_file, 'docx')['text']
         except Exception as e:
             # print(f"[ERROR] DOCX extraction failed: {e}")
             return ""
@@ -233,6 +528,11 @@ class AIResumeAnalyzer:
         # Always set the API key directly for reliability
         if self.google_api_key:
             genai.configure(api_key=self.google_api_key)
+            # Resolve the Gemini model once at startup; later instances hit the cache
+            try:
+                get_model_registry().resolve()
+            except Exception as e:
+                print(f"Gemini model discovery failed: {e}")
         else:
             # Fallback: try to set a hardcoded key if available
             try:
@@ -242,28 +542,18 @@ class AIResumeAnalyzer:
                 pass
     
     def extract_text_from_pdf(self, pdf_file):
-        """Extract text from PDF using pdfplumber and OCR if needed"""
-        text = ""
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            if hasattr(pdf_file, 'getbuffer'):
-                temp_file.write(pdf_file.getbuffer())
-            elif hasattr(pdf_file, 'read'):
-                temp_file.write(pdf_file.read())
-                pdf_file.seek(0)
-            else:
-                temp_file.write(pdf_file)
-            temp_path = temp_file.name
+        """Extract text from PDF using the shared extraction engine"""
+        return self.extract_pdf(pdf_file)[0]
+
+    def extract_pdf(self, pdf_file):
+        """Extract text and page count from a PDF with a single parse"""
         try:
-            with pdfplumber.open(temp_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            # print("[DEBUG] First 500 chars of PDF extracted text:", (text[:500] if text else "<EMPTY>"))
-            return text.strip()
+            result = extract_text(pdf_file, 'pdf')
+            # print("[DEBUG] First 500 chars of PDF extracted text:", (result['text'][:500] if result['text'] else "<EMPTY>"))
+            return result['text'], result['num_pages']
         except Exception as e:
             # print(f"[ERROR] PDF extraction failed: {e}")
-            return ""
+            return "", 0
 
     def simple_generate_pdf_report(self, analysis_result, candidate_name, job_role):
         """Generate a simple PDF report with candidate info and analysis summary."""
@@ -315,11 +605,13 @@ class AIResumeAnalyzer:
                 pass
 
         # Executive Summary
+        if "sections" not in analysis_result:
+            # Results from before the structured parser: parse the raw text once
+            analysis_result = dict(parse_analysis(analysis_result.get("full_response", "") or analysis_result.get("analysis", "")),
+                                   **analysis_result)
         analysis_text = analysis_result.get("full_response", "") or analysis_result.get("analysis", "")
-        summary = ""
-        if "## Overall Assessment" in analysis_text:
-            summary = analysis_text.split("## Overall Assessment")[1].split("##")[0].strip()
-        elif analysis_text:
+        summary = analysis_result.get("overall_assessment", "")
+        if not summary and analysis_text:
             summary = analysis_text.strip().split("\n")[0]
         if summary:
             content.append(Paragraph("<b>Executive Summary:</b>", styles['Heading2']))
@@ -360,10 +652,11 @@ class AIResumeAnalyzer:
         buffer.seek(0)
         return buffer
 
-    def process_sections(self, analysis_text, content, normal_style, list_item_style, subheading_style, heading_style, clean_markdown):
-        """Process sections of the analysis text with special handling for certain sections"""
-        # Parse the markdown-like content
-        sections = analysis_text.split("##")
+    def process_sections(self, analysis, content, normal_style, list_item_style, subheading_style, heading_style, clean_markdown=clean_markdown):
+        """Add the detailed analysis sections of a parsed analysis (from analyze_resume) to the report"""
+        if isinstance(analysis, str):
+            analysis = parse_analysis(analysis)
+        sections = analysis.get("sections", [])
         
         # Define sections to include in detailed analysis
         detailed_sections = [
@@ -381,12 +674,7 @@ class AIResumeAnalyzer:
         content.append(Spacer(1, 0.1*inch))
         
         for section in sections:
-            if not section.strip():
-                continue
-            
-            # Extract section title and content
-            lines = section.strip().split("\n")
-            section_title = lines[0].strip()
+            section_title = section["title"]
             
             # Skip sections we don't want in the detailed analysis
             if section_title not in detailed_sections and section_title != "Overall Assessment":
@@ -396,7 +684,7 @@ class AIResumeAnalyzer:
             if section_title == "Overall Assessment":
                 continue
             
-            section_content = "\n".join(lines[1:]).strip()
+            section_content = section["body"]
             
             # Add section title
             content.append(Paragraph(section_title, subheading_style))
@@ -404,28 +692,8 @@ class AIResumeAnalyzer:
             
             # Process content based on section
             if section_title == "Skills Analysis":
-                # Extract current and missing skills
-                current_skills = []
-                missing_skills = []
-                
-                if "Current Skills" in section_content:
-                    current_part = section_content.split("Current Skills")[1]
-                    if "Missing Skills" in current_part:
-                        current_part = current_part.split("Missing Skills")[0]
-                    
-                    for line in current_part.split("\n"):
-                        if line.strip() and ("-" in line or "*" in line or "•" in line):
-                            skill = clean_markdown(line.replace("-", "").replace("*", "").replace("•", "").strip())
-                            if skill:
-                                current_skills.append(skill)
-                
-                if "Missing Skills" in section_content:
-                    missing_part = section_content.split("Missing Skills")[1]
-                    for line in missing_part.split("\n"):
-                        if line.strip() and ("-" in line or "*" in line or "•" in line):
-                            skill = clean_markdown(line.replace("-", "").replace("*", "").replace("•", "").strip())
-                            if skill:
-                                missing_skills.append(skill)
+                current_skills = analysis.get("current_skills", [])
+                missing_skills = analysis.get("missing_skills", [])
                 
                 # Create skills table with better formatting
                 if current_skills or missing_skills:
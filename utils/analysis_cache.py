@@ -0,0 +1,173 @@
+"""
+Persistent cache for AI resume analyses
+
+Full structured analysis results are stored in SQLite, keyed by a hash of the
+normalized resume text, the target job role, the model and the prompt version.
+Re-analyzing the same resume for the same role (role selector tweaks, page
+reloads) is answered from the cache instead of another LLM request.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+
+def normalize_resume_text(text):
+    """Collapse whitespace so re-extracted copies of a resume hash the same"""
+    return ' '.join((text or '').split())
+
+
+class AnalysisCache:
+    """SQLite-backed LRU cache of analysis results.
+
+    Each row holds one JSON-encoded result dict. Once the table grows past
+    max_entries, the least recently read or written rows are evicted.
+    """
+
+    def __init__(self, db_path='resume_data.db', max_entries=1000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_table(self):
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_analysis_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    job_role TEXT,
+                    model TEXT,
+                    prompt_version TEXT,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_llm_analysis_cache_last_used
+                ON llm_analysis_cache (last_used)
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(resume_text, job_role, model, prompt_version, job_description=None):
+        """Build the cache key for one analysis request"""
+        parts = [
+            normalize_resume_text(resume_text),
+            job_role or '',
+            normalize_resume_text(job_description),
+            model or '',
+            str(prompt_version),
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    'SELECT result FROM llm_analysis_cache WHERE cache_key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute(
+                    'UPDATE llm_analysis_cache SET last_used = ? WHERE cache_key = ?', (time.time(), key)
+                )
+                conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                print(f"Error reading analysis cache: {e}")
+                return None
+            finally:
+                conn.close()
+
+    def put(self, key, result, job_role=None, model=None, prompt_version=None):
+        """Store a result and evict the least recently used rows past the size cap"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO llm_analysis_cache
+                    (cache_key, job_role, model, prompt_version, result, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (key, job_role, model, None if prompt_version is None else str(prompt_version),
+                      json.dumps(result), now, now))
+                conn.execute('''
+                    DELETE FROM llm_analysis_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_analysis_cache
+                        ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing analysis cache: {e}")
+                conn.rollback()
+            finally:
+                conn.close()
+
+    def purge(self, job_role=None, model=None):
+        """Delete cached results (all of them, or only those for a role and/or model).
+
+        Returns the number of rows removed.
+        """
+        clauses, params = [], []
+        if job_role:
+            clauses.append('job_role = ?')
+            params.append(job_role)
+        if model:
+            clauses.append('model = ?')
+            params.append(model)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            conn = self._connect()
+            try:
+                removed = conn.execute(f'DELETE FROM llm_analysis_cache{where}', params).rowcount
+                conn.commit()
+                return removed
+            except sqlite3.Error as e:
+                print(f"Error purging analysis cache: {e}")
+                conn.rollback()
+                return 0
+            finally:
+                conn.close()
+
+    def stats(self):
+        """Return entry count and hit/miss counters for the admin dashboard"""
+        conn = self._connect()
+        try:
+            entries = conn.execute('SELECT COUNT(*) FROM llm_analysis_cache').fetchone()[0]
+        except sqlite3.Error:
+            entries = 0
+        finally:
+            conn.close()
+        return {'entries': entries, 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses}
+
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Return the process-wide analysis cache, configured from the environment"""
+    global _analysis_cache
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = AnalysisCache(
+                db_path=os.getenv("ANALYSIS_CACHE_DB", "resume_data.db"),
+                max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "1000"))
+            )
+        return _analysis_cache
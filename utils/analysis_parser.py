@@ -0,0 +1,345 @@
+"""
+Parsing helpers for AI analysis responses
+
+The analysis prompt asks for a markdown report made of ``## Heading``
+sections, or, in JSON mode, for a single JSON object. Either way the response
+is parsed exactly once into a structured dict (section bodies, bullet lists,
+scores) that the UI and the PDF report read directly.
+
+SectionStreamer splits the markdown report incrementally while it is being
+streamed, reporting each section as soon as the next heading (or the end of
+the response) shows it is complete. Its sections feed straight into
+build_analysis(), so a streamed response is not scanned a second time.
+"""
+import re
+import json
+
+# Heading prefix -> result key, in report order
+SECTION_KEYS = [
+    ("Overall Assessment", "overall_assessment"),
+    ("Professional Profile Analysis", "professional_profile"),
+    ("Skills Analysis", "skills_analysis"),
+    ("Experience Analysis", "experience_analysis"),
+    ("Education Analysis", "education_analysis"),
+    ("Key Strengths", "strengths"),
+    ("Areas for Improvement", "weaknesses"),
+    ("ATS Optimization Assessment", "ats_optimization"),
+    ("Recommended Courses/Certifications", "suggestions"),
+    ("Resume Score", "resume_score_section"),
+    ("Role Alignment Analysis", "role_alignment"),
+    ("Job Match Analysis", "job_match"),
+    ("Key Job Requirements Not Met", "missing_requirements"),
+]
+SECTION_TITLES = {key: title for title, key in SECTION_KEYS}
+LIST_SECTIONS = ("strengths", "weaknesses", "suggestions", "missing_requirements")
+# Sections a usable analysis must contain (the role and job-match blocks are optional)
+REQUIRED_SECTIONS = ("overall_assessment", "skills_analysis", "strengths", "weaknesses", "ats_optimization",
+                     "suggestions")
+
+_MARKDOWN_PATTERNS = [
+    (re.compile(r'\*\*(.*?)\*\*'), r'\1'),
+    (re.compile(r'\*(.*?)\*'), r'\1'),
+    (re.compile(r'__(.*?)__'), r'\1'),
+    (re.compile(r'_(.*?)_'), r'\1'),
+    (re.compile(r'^#{1,6}\s+', re.MULTILINE), ''),
+    (re.compile(r'\[(.*?)\]\(.*?\)'), r'\1'),
+]
+_RESUME_SCORE = re.compile(r'Resume Score:\s*(\d{1,3})/100')
+_ATS_SCORE = re.compile(r'ATS Score:\s*(\d{1,3})/100')
+_FIRST_NUMBER = re.compile(r'\b(\d{1,3})\b')
+_BULLETS = ('-', '*', '•')
+
+
+def clean_markdown(text):
+    """Strip inline markdown (bold, italics, headings, links) from text"""
+    if not text:
+        return ""
+    for pattern, replacement in _MARKDOWN_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def section_key(title):
+    """Return the result key for a section heading, or None for unknown headings"""
+    for heading, key in SECTION_KEYS:
+        # Match on the first words so "Recommended Courses" still maps to its section
+        if title.startswith(heading.split('/')[0]):
+            return key
+    return None
+
+
+class SectionStreamer:
+    """Incrementally split streamed markdown into (title, body) sections"""
+
+    def __init__(self, on_section=None):
+        self.on_section = on_section
+        self.sections = []
+        self._buffer = ''
+        self._title = None
+        self._lines = []
+
+    def feed(self, text):
+        """Add a chunk of streamed text, emitting any section it completes"""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._add_line(line)
+
+    def close(self):
+        """Flush the trailing line and emit the last section"""
+        if self._buffer:
+            self._add_line(self._buffer)
+            self._buffer = ''
+        self._emit()
+        self._title = None
+
+    def _add_line(self, line):
+        stripped = line.strip()
+        if stripped.startswith('## '):
+            self._emit()
+            self._title = stripped[3:].strip().strip('*').strip()
+            self._lines = []
+        else:
+            self._lines.append(line)
+
+    def _emit(self):
+        if self._title is None:
+            return
+        body = '\n'.join(self._lines).strip()
+        self.sections.append((self._title, body))
+        if self.on_section:
+            self.on_section(self._title, body)
+
+
+def split_sections(text):
+    """Split a complete markdown report into (title, body) sections"""
+    streamer = SectionStreamer()
+    streamer.feed(text or '')
+    streamer.close()
+    return streamer.sections
+
+
+def _bullet_items(body):
+    """Return the cleaned bullet items of a section body"""
+    items = []
+    for line in body.split('\n'):
+        line = line.strip()
+        if not line.startswith(_BULLETS):
+            continue
+        if line[:2] in ('- ', '* ', '• '):
+            line = line[2:]
+        elif not line.startswith('**'):
+            line = line[1:]
+        item = clean_markdown(line)
+        if item:
+            items.append(item)
+    return items
+
+
+def _skill_lists(body):
+    """Split the Skills Analysis body into (current_skills, missing_skills) bullets"""
+    current, missing, target = [], [], None
+    for line in body.split('\n'):
+        label = next((label for label in ('Current Skills', 'Missing Skills', 'Skill Proficiency') if label in line), None)
+        if label:
+            target = {'Current Skills': current, 'Missing Skills': missing}.get(label)
+            # "- **Current Skills**: Python, SQL" keeps the skills on the label line
+            rest = clean_markdown(line.split(label, 1)[1].lstrip('*_: '))
+            if target is not None and rest:
+                target.append(rest)
+        elif target is not None:
+            target.extend(_bullet_items(line))
+    return current, missing
+
+
+def _clamp_score(value):
+    try:
+        return max(0, min(int(value), 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_analysis(sections, full_text=''):
+    """Build the structured analysis dict from (title, body) sections"""
+    result = {
+        'sections': [],
+        'strengths': [],
+        'weaknesses': [],
+        'suggestions': [],
+        'missing_requirements': [],
+        'current_skills': [],
+        'missing_skills': [],
+        'score': 0,
+        'ats_score': 0,
+    }
+    for title, body in sections:
+        key = section_key(title)
+        result['sections'].append({'key': key, 'title': title, 'body': body})
+        if key is None:
+            continue
+        if key in LIST_SECTIONS:
+            result[key] = _bullet_items(body)
+        elif key == 'resume_score_section':
+            match = _RESUME_SCORE.search(body) or _FIRST_NUMBER.search(body)
+            if match:
+                result['score'] = _clamp_score(match.group(1))
+        else:
+            result[key] = body
+            if key == 'skills_analysis':
+                result['current_skills'], result['missing_skills'] = _skill_lists(body)
+            elif key == 'ats_optimization':
+                match = _ATS_SCORE.search(body)
+                if match:
+                    result['ats_score'] = _clamp_score(match.group(1))
+    if not result['score'] and full_text:
+        # The model sometimes puts the score outside its section
+        match = _RESUME_SCORE.search(full_text)
+        if match:
+            result['score'] = _clamp_score(match.group(1))
+    result['resume_score'] = result['score']
+    return result
+
+
+def parse_analysis(text, sections=None):
+    """Parse a markdown analysis in one pass (reusing already streamed sections when given)"""
+    if sections is None:
+        sections = split_sections(text)
+    return build_analysis(sections, text)
+
+
+def validate_analysis(parsed, min_items=3):
+    """Return the problems that make a parsed analysis unusable or low-confidence (empty when it is fine)"""
+    problems = []
+    for key in REQUIRED_SECTIONS:
+        if not parsed.get(key):
+            problems.append(f"missing {SECTION_TITLES[key]}")
+    if not parsed.get('score'):
+        problems.append("no Resume Score")
+    if not parsed.get('ats_score'):
+        problems.append("no ATS Score")
+    # A handful of one-line strengths/improvements usually means a truncated or lazy answer
+    for key in ('strengths', 'weaknesses'):
+        items = parsed.get(key) or []
+        if items and len(items) < min_items:
+            problems.append(f"only {len(items)} {SECTION_TITLES[key]}")
+    return problems
+
+
+# JSON mode: the schema requested from the model
+JSON_SCHEMA_PROMPT = """
+Respond with a single JSON object and nothing else, using exactly these keys:
+{
+  "overall_assessment": "string",
+  "professional_profile": "string",
+  "skills_analysis": {"current_skills": ["string"], "skill_proficiency": "string", "missing_skills": ["string"]},
+  "experience_analysis": "string",
+  "education_analysis": "string",
+  "strengths": ["string"],
+  "weaknesses": ["string"],
+  "ats_optimization": "string",
+  "ats_score": 0,
+  "suggestions": ["string"],
+  "resume_score": 0,
+  "role_alignment": "string",
+  "job_match": "string",
+  "missing_requirements": ["string"]
+}
+Scores are integers from 0 to 100. Use an empty string or list for anything that does not apply.
+"""
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        value = [value] if value.strip() else []
+    return [clean_markdown(str(item)) for item in value or [] if str(item).strip()]
+
+
+def parse_analysis_json(text):
+    """Parse a JSON-mode response into the same structure as parse_analysis().
+
+    Raises ValueError when the response is not a JSON object.
+    """
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("AI response is not a JSON object")
+
+    skills = data.get('skills_analysis') or {}
+    if isinstance(skills, str):
+        skills = {'skill_proficiency': skills}
+    current_skills = _as_list(skills.get('current_skills'))
+    missing_skills = _as_list(skills.get('missing_skills'))
+    skills_body = '\n'.join(
+        part for part in (
+            "- **Current Skills**: " + ', '.join(current_skills) if current_skills else '',
+            "- **Skill Proficiency**: " + skills['skill_proficiency'] if skills.get('skill_proficiency') else '',
+            "- **Missing Skills**: " + ', '.join(missing_skills) if missing_skills else '',
+        ) if part
+    )
+    score = _clamp_score(data.get('resume_score'))
+    ats_score = _clamp_score(data.get('ats_score'))
+
+    sections = []
+    result = {'current_skills': current_skills, 'missing_skills': missing_skills,
+              'score': score, 'resume_score': score, 'ats_score': ats_score}
+    for title, key in SECTION_KEYS:
+        if key in LIST_SECTIONS:
+            items = _as_list(data.get(key))
+            result[key] = items
+            body = '\n'.join(f"- {item}" for item in items)
+        elif key == 'skills_analysis':
+            body = skills_body
+            result[key] = body
+        elif key == 'resume_score_section':
+            body = f"Resume Score: {score}/100"
+        else:
+            body = str(data.get(key) or '').strip()
+            if key == 'ats_optimization':
+                body = f"ATS Score: {ats_score}/100\n{body}".strip()
+            result[key] = body
+        if body:
+            sections.append({'key': key, 'title': title, 'body': body})
+    result['sections'] = sections
+    return result
+
+
+# Packed bulk scoring: one compact entry per resume
+PACKED_SCHEMA_PROMPT = """
+Respond with a single JSON object and nothing else, in exactly this shape:
+{"results": [{"id": "R1", "resume_score": 0, "ats_score": 0, "strengths": ["string"], "weaknesses": ["string"]}]}
+Include exactly one entry per resume, using the id from its header. Scores are integers from 0 to 100.
+Give 3 short strengths and 3 short weaknesses for each resume.
+"""
+
+
+def parse_packed_scores(text, ids):
+    """Parse a packed scoring response into {id: scores} for the entries that pass validation.
+
+    Entries with an unknown id, a repeat of an earlier id, a missing score or
+    no strengths/weaknesses are left out. Raises ValueError when the response is
+    not JSON.
+    """
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('results')
+    if not isinstance(data, list):
+        raise ValueError("Packed AI response has no results array")
+    scores = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        resume_id = str(entry.get('id', '')).strip()
+        if resume_id not in ids or resume_id in scores:
+            continue
+        score = _clamp_score(entry.get('resume_score'))
+        ats_score = _clamp_score(entry.get('ats_score'))
+        strengths = _as_list(entry.get('strengths'))
+        weaknesses = _as_list(entry.get('weaknesses'))
+        if score and ats_score and strengths and weaknesses:
+            scores[resume_id] = {'score': score, 'resume_score': score, 'ats_score': ats_score,
+                                 'strengths': strengths, 'weaknesses': weaknesses}
+    return scores
+
+
+def to_markdown(sections):
+    """Render parsed sections back into the markdown report format"""
+    return '\n\n'.join(f"## {section['title']}\n{section['body']}" for section in sections)
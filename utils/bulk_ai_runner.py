@@ -0,0 +1,245 @@
+"""
+Resumable bulk AI analysis
+
+Runs AIResumeAnalyzer over a set of resumes for one role with bounded
+concurrency. Rate-limit and server errors (HTTP 429/5xx) are retried with
+exponential backoff and full jitter, and every finished item is checkpointed
+to SQLite, so a crashed or interrupted run picks up where it stopped when it
+is started again with the same job id. With pack_size > 1 only scores,
+strengths and weaknesses are requested, several resumes per request.
+"""
+import json
+import time
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .text_extraction import extract_text
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+def is_retryable(result):
+    """Return True for results that failed with a rate-limit or server error"""
+    status = result.get('status_code')
+    return 'error' in result and status is not None and int(status) in RETRYABLE_STATUS
+
+
+class BulkAICheckpoint:
+    """Per-item results of bulk AI jobs, stored in SQLite"""
+
+    def __init__(self, db_path='resume_data.db'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS bulk_ai_results (
+                    job_id TEXT NOT NULL,
+                    file TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER DEFAULT 0,
+                    resume_score INTEGER,
+                    ats_score INTEGER,
+                    result TEXT,
+                    error TEXT,
+                    elapsed_ms REAL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (job_id, file)
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def completed(self, job_id):
+        """Return the files of a job that already have a final result"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT file FROM bulk_ai_results WHERE job_id = ? AND status = 'done'", (job_id,)
+            ).fetchall()
+            return {row[0] for row in rows}
+        finally:
+            conn.close()
+
+    def clear(self, job_id):
+        """Forget every result of a job so it starts from scratch"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM bulk_ai_results WHERE job_id = ?', (job_id,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record(self, job_id, file, status, attempts, result=None, error=None, elapsed_ms=None):
+        """Insert or update the result for one file"""
+        result = result or {}
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO bulk_ai_results
+                    (job_id, file, status, attempts, resume_score, ats_score, result, error, elapsed_ms, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (job_id, file, status, attempts, result.get('score'), result.get('ats_score'),
+                      json.dumps(result) if result else None, error, elapsed_ms))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error saving bulk AI result: {e}")
+                conn.rollback()
+            finally:
+                conn.close()
+
+    def results(self, job_id):
+        """Yield one record dict per file of a job"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('''
+                SELECT file, status, attempts, resume_score, ats_score, result, error, elapsed_ms
+                FROM bulk_ai_results WHERE job_id = ? ORDER BY file
+            ''', (job_id,)).fetchall()
+        finally:
+            conn.close()
+        for file, status, attempts, score, ats_score, result, error, elapsed_ms in rows:
+            record = {'file': file, 'status': status, 'attempts': attempts,
+                      'resume_score': score, 'ats_score': ats_score, 'elapsed_ms': elapsed_ms}
+            if result:
+                parsed = json.loads(result)
+                for key in ('strengths', 'weaknesses', 'suggestions', 'model_used'):
+                    record[key] = parsed.get(key)
+            if error:
+                record['error'] = error
+            yield record
+
+
+class BulkAIRunner:
+    """Run AI analyses for many resumes with bounded concurrency, retries and checkpoints"""
+
+    def __init__(self, analyzer, checkpoint, job_id, job_role, role_info=None, model="Google Gemini",
+                 concurrency=4, max_retries=5, base_delay=1.0, max_delay=60.0, pack_size=1):
+        self.analyzer = analyzer
+        self.checkpoint = checkpoint
+        self.job_id = job_id
+        self.job_role = job_role
+        self.role_info = role_info
+        self.model = model
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.pack_size = pack_size
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def analyze_file(self, path):
+        """Extract and analyze one resume, retrying transient provider errors; returns a record"""
+        started = time.perf_counter()
+        attempts = 0
+        try:
+            text = extract_text(path)['text']
+            while True:
+                attempts += 1
+                result = self.analyzer.analyze_resume(
+                    text, job_role=self.job_role, role_info=self.role_info, model=self.model,
+                    allow_fallback=False
+                )
+                if not is_retryable(result) or attempts > self.max_retries:
+                    break
+                time.sleep(self.backoff_delay(attempts - 1))
+        except Exception as e:
+            result = {'error': str(e)}
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        status = 'error' if 'error' in result else 'done'
+        self.checkpoint.record(self.job_id, path, status, attempts,
+                               result=None if status == 'error' else result,
+                               error=result.get('error'), elapsed_ms=elapsed_ms)
+        return {'file': path, 'status': status, 'attempts': attempts, 'error': result.get('error')}
+
+    def analyze_pack(self, paths):
+        """Extract and score several resumes with packed requests, retrying transient errors; returns records"""
+        started = time.perf_counter()
+        results = {}
+        texts = {}
+        for path in paths:
+            try:
+                texts[path] = extract_text(path)['text']
+            except Exception as e:
+                results[path] = {'error': str(e)}
+        attempts = 0
+        pending = texts
+        while pending:
+            attempts += 1
+            try:
+                batch = self.analyzer.score_resumes_packed(
+                    pending, job_role=self.job_role, role_info=self.role_info, model=self.model
+                )
+            except Exception as e:
+                batch = {path: {'error': str(e)} for path in pending}
+            retry = {}
+            for path, text in pending.items():
+                result = batch.get(path) or {'error': "No result returned"}
+                if is_retryable(result) and attempts <= self.max_retries:
+                    retry[path] = text
+                else:
+                    results[path] = result
+            pending = retry
+            if pending:
+                time.sleep(self.backoff_delay(attempts - 1))
+
+        # Items share their requests, so each is charged the pack's average time
+        elapsed_ms = round((time.perf_counter() - started) * 1000 / max(1, len(paths)), 1)
+        records = []
+        for path in paths:
+            result = results[path]
+            status = 'error' if 'error' in result else 'done'
+            self.checkpoint.record(self.job_id, path, status, attempts,
+                                   result=None if status == 'error' else result,
+                                   error=result.get('error'), elapsed_ms=elapsed_ms)
+            records.append({'file': path, 'status': status, 'attempts': attempts, 'error': result.get('error')})
+        return records
+
+    def run(self, files, progress=None):
+        """Analyze every file not already completed for this job.
+
+        progress(done, total, started) is called after each item. Returns the
+        number of items processed in this run.
+        """
+        done_before = self.checkpoint.completed(self.job_id)
+        pending_files = [path for path in files if path not in done_before]
+        total = len(pending_files)
+        done = 0
+        started = time.monotonic()
+        if self.pack_size > 1:
+            units = [pending_files[i:i + self.pack_size] for i in range(0, total, self.pack_size)]
+            task = self.analyze_pack
+        else:
+            units = pending_files
+            task = lambda path: [self.analyze_file(path)]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='bulk-ai') as executor:
+            queue = iter(units)
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                # Keep a small window in flight instead of queueing every file up front
+                while not exhausted and len(pending) < self.concurrency * 2:
+                    unit = next(queue, None)
+                    if unit is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(task, unit))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done += sum(len(future.result()) for future in finished)
+                if progress:
+                    progress(done, total, started)
+        return done
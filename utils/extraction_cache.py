@@ -0,0 +1,152 @@
+"""
+Content-addressed cache for text extracted from uploaded resumes
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ExtractionCache:
+    """LRU cache of extraction results keyed by a hash of the uploaded bytes.
+
+    Entries are small dicts such as {'text': ..., 'num_pages': ...}. An optional
+    on-disk tier (one JSON file per entry) lets repeated uploads hit across
+    sessions and process restarts.
+    """
+
+    def __init__(self, max_entries=128, cache_dir=None, max_disk_entries=2000):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(file_bytes, extractor):
+        """Build a cache key from the file content and the extractor that produced the text"""
+        return f"{extractor}-{hashlib.sha256(file_bytes).hexdigest()}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached entry for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry in memory and, when enabled, on disk"""
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def get_or_extract(self, file_bytes, extractor, extract, should_cache=None):
+        """Return the cached entry for file_bytes, calling extract() to fill it on a miss.
+
+        Entries for which should_cache(entry) is False (e.g. incomplete OCR)
+        are returned but not stored.
+        """
+        key = self.make_key(file_bytes, extractor)
+        entry = self.get(key)
+        if entry is None:
+            entry = extract()
+            if entry is not None and (should_cache is None or should_cache(entry)):
+                self.put(key, entry)
+        return entry
+
+    def clear(self):
+        """Drop every in-memory entry and the on-disk tier"""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def _store(self, key, entry):
+        # Caller holds the lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            # Refresh the modification time so disk eviction is least-recently-used
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+            self._prune_disk()
+        except OSError as e:
+            print(f"Error writing extraction cache entry: {e}")
+
+    def _prune_disk(self):
+        """Evict the least recently used files once the disk tier exceeds its cap"""
+        files = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir) if name.endswith('.json')
+        ]
+        excess = len(files) - self.max_disk_entries
+        if excess <= 0:
+            return
+        files.sort(key=lambda path: os.path.getmtime(path))
+        for path in files[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache, configured from the environment"""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache(
+                max_entries=int(os.getenv("EXTRACTION_CACHE_SIZE", "128")),
+                cache_dir=os.getenv("EXTRACTION_CACHE_DIR") or None,
+                max_disk_entries=int(os.getenv("EXTRACTION_CACHE_DISK_SIZE", "2000"))
+            )
+        return _extraction_cache
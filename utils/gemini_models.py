@@ -0,0 +1,133 @@
+"""
+Process-wide Gemini model discovery
+
+Picking a model used to cost a genai.list_models() round trip on every
+analysis. The registry resolves the preferred available model once, caches
+it for GEMINI_MODEL_CACHE_TTL seconds, persists the last known good choice to
+disk, and reuses GenerativeModel instances across requests and sessions.
+"""
+import os
+import json
+import time
+import threading
+
+import google.generativeai as genai
+
+# Preferred models, best first
+GEMINI_MODEL_PREFERENCE = [
+    "gemini-2.5-flash",
+    "gemini-2.5-pro",
+    "gemini-pro-latest",
+    "gemini-1.5-flash",
+    "gemini-pro",
+]
+
+
+class GeminiModelRegistry:
+    def __init__(self, preference=None, ttl=3600, state_file=None, retry_interval=60):
+        self.preference = list(preference or GEMINI_MODEL_PREFERENCE)
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._model_name = None
+        self._available = []
+        self._expires_at = 0.0
+        self._discovering = False
+        self._models = {}
+
+    def _load_last_known_good(self):
+        if not self.state_file:
+            return None
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._available = self._available or state.get('available', [])
+        return state.get('model')
+
+    def _save_last_known_good(self, model_name, available):
+        if not self.state_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump({'model': model_name, 'available': available, 'saved_at': time.time()}, f)
+        except OSError as e:
+            print(f"Error saving Gemini model choice: {e}")
+
+    def _discover(self):
+        """List the account's models and return the available preferred ones, best first"""
+        available = {m.name.split('/')[-1] for m in genai.list_models()}
+        return [name for name in self.preference if name in available]
+
+    def resolve(self, refresh=False):
+        """Return the preferred available model name, listing models only when the cache is stale"""
+        with self._lock:
+            fresh = self._model_name and time.monotonic() < self._expires_at
+            if fresh and not refresh:
+                return self._model_name
+            if self._discovering and self._model_name and not refresh:
+                # Another caller is already listing models; keep serving the current choice
+                return self._model_name
+            self._discovering = True
+        try:
+            # The network call runs outside the lock so other callers are not blocked behind it
+            available = self._discover()
+        except Exception as e:
+            # Keep serving with the previous or persisted choice while discovery is failing
+            print(f"Gemini model discovery failed: {e}")
+            with self._lock:
+                self._discovering = False
+                self._model_name = self._model_name or self._load_last_known_good()
+                # Retry after a short backoff rather than trusting a stale choice for the whole TTL
+                self._expires_at = time.monotonic() + self.retry_interval
+                return self._model_name
+        with self._lock:
+            self._discovering = False
+            self._available = available
+            self._model_name = available[0] if available else None
+            self._expires_at = time.monotonic() + self.ttl
+            model_name = self._model_name
+        if model_name:
+            self._save_last_known_good(model_name, available)
+        return model_name
+
+    def refresh(self):
+        """Force a new model listing (e.g. after enabling a model on the account)"""
+        return self.resolve(refresh=True)
+
+    def available_models(self):
+        """Preferred models available to the account, best first"""
+        self.resolve()
+        return list(self._available)
+
+    def get_model(self, model_name=None):
+        """Return a cached GenerativeModel for model_name (the resolved model by default)"""
+        model_name = model_name or self.resolve()
+        if not model_name:
+            return None
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Return the process-wide Gemini model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GeminiModelRegistry(
+                ttl=float(os.getenv("GEMINI_MODEL_CACHE_TTL", "3600")),
+                state_file=os.getenv("GEMINI_MODEL_STATE_FILE", os.path.join(".cache", "gemini_model.json")),
+                retry_interval=float(os.getenv("GEMINI_MODEL_RETRY_SECONDS", "60"))
+            )
+        return _registry
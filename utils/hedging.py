@@ -0,0 +1,202 @@
+"""
+Hedged LLM requests
+
+A few generations take far longer than the rest. When hedging is enabled
+(AI_HEDGE_ENABLED=true), a request that has not produced output by the
+AI_HEDGE_PERCENTILE latency of recent calls (time from the first request to
+the first output, whichever attempt produced it) gets a second request, to the
+same model or, for Gemini, to the faster GEMINI_HEDGE_MODEL. The first
+attempt to produce output wins. A losing stream is stopped at its next chunk;
+a losing non-streaming request has no cancellation point, so it runs to
+completion (holding its HTTP connection and a pool thread) and its response
+is discarded. Until AI_HEDGE_MIN_SAMPLES latencies have been seen the
+deadline is AI_HEDGE_DELAY seconds.
+"""
+import os
+import math
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "false").lower() == "true"
+# Provider label -> faster model for hedge requests; providers not listed repeat the primary model
+HEDGE_MODELS = {
+    "Google Gemini": os.getenv("GEMINI_HEDGE_MODEL", "").strip() or None,
+}
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, p):
+        """Return the p-th percentile (0-100) of the window, or None when it is empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(math.ceil(p / 100.0 * len(samples))) - 1))
+        return samples[index]
+
+
+class _Attempt:
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.cancel = threading.Event()
+        self.started = time.monotonic()
+        self.future = None
+
+
+class Hedger:
+    """Run a call with an optional hedge request after a percentile deadline"""
+
+    def __init__(self, percentile=95.0, min_samples=20, default_delay=10.0, min_delay=1.0,
+                 window=200, max_workers=32):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.window = window
+        self._trackers = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-hedge')
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+
+    def _tracker(self, key):
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = self._trackers[key] = LatencyTracker(self.window)
+            return tracker
+
+    def delay(self, key):
+        """Seconds to wait for the primary attempt before sending the hedge"""
+        tracker = self._tracker(key)
+        if len(tracker) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def run(self, key, primary, hedge=None, cancel_event=None):
+        """Return the result of whichever attempt produces output first.
+
+        primary and hedge are called as fn(cancel_event, claim). An attempt
+        calls claim() once it has output to report (its first streamed chunk or
+        its full response); claim() returns False for the loser, which should
+        then stop by raising Cancelled. The loser's cancel_event is set as soon
+        as the winner claims, and every attempt's is set when the caller's
+        cancel_event is; only attempts that check it (streams) stop early, a
+        non-streaming loser finishes its request before claim() turns it away.
+        key groups calls whose latencies are comparable (e.g.
+        one provider in streaming mode).
+        """
+        tracker = self._tracker(key)
+        state_lock = threading.Lock()
+        attempts = []
+        winner = []
+
+        def make_claim(attempt):
+            def claim():
+                with state_lock:
+                    if not winner:
+                        winner.append(attempt)
+                        for other in attempts:
+                            if other is not attempt:
+                                other.cancel.set()
+                    won = winner[0] is attempt
+                if won:
+                    # One sample per call, timed from the primary's start: when the hedge wins this is
+                    # a lower bound on the primary's latency, so slow primaries still pull the deadline up
+                    tracker.record(time.monotonic() - attempts[0].started)
+                return won
+            return claim
+
+        def start(name, fn):
+            attempt = _Attempt(name, fn)
+            with state_lock:
+                attempts.append(attempt)
+            attempt.future = self._pool.submit(fn, attempt.cancel, make_claim(attempt))
+            return attempt
+
+        with self._lock:
+            self.calls += 1
+        first = start('primary', primary)
+        deadline = first.started + self.delay(key)
+        second = None
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                for attempt in attempts:
+                    attempt.cancel.set()
+            with state_lock:
+                won = winner[0] if winner else None
+            if won is not None and won.future.done():
+                break
+            if won is None and all(attempt.future.done() for attempt in attempts):
+                # Nobody produced output: surface the primary's outcome (usually its error)
+                won = first
+                break
+            now = time.monotonic()
+            if (hedge is not None and second is None and won is None and not first.future.done()
+                    and now >= deadline and not (cancel_event is not None and cancel_event.is_set())):
+                second = start('hedge', hedge)
+                with self._lock:
+                    self.hedged += 1
+                continue
+            timeout = 0.25 if second is not None or hedge is None else max(0.0, min(0.25, deadline - now))
+            wait([attempt.future for attempt in attempts if not attempt.future.done()],
+                 timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if second is not None and won.future.exception() is None:
+            with self._lock:
+                if won is second:
+                    self.hedge_wins += 1
+                else:
+                    self.primary_wins += 1
+        return won.future.result()
+
+    def stats(self):
+        """Return hedge counts and the current deadline for every latency key"""
+        with self._lock:
+            keys = list(self._trackers)
+            stats = {
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'hedge_rate': round(self.hedged / self.calls, 3) if self.calls else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'primary_wins': self.primary_wins,
+            }
+        stats['deadlines'] = {key: round(self.delay(key), 2) for key in keys}
+        return stats
+
+
+_hedger = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger():
+    """Return the process-wide hedger for LLM calls"""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger(
+                percentile=float(os.getenv("AI_HEDGE_PERCENTILE", "95")),
+                min_samples=int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20")),
+                default_delay=float(os.getenv("AI_HEDGE_DELAY", "10")),
+                min_delay=float(os.getenv("AI_HEDGE_MIN_DELAY", "1")),
+            )
+        return _hedger
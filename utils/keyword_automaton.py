@@ -0,0 +1,72 @@
+"""
+Aho-Corasick keyword automaton for scanning resume text against large keyword dictionaries
+"""
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Match every keyword of a dictionary in one left-to-right scan of the text.
+
+    Keywords are matched case-insensitively as plain substrings, the same way the
+    analyzers previously used ``keyword in text.lower()``.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = []
+        self._known = set()
+        self._goto = [{}]      # state -> {char: next_state}
+        self._fail = [0]       # state -> failure link
+        self._output = [()]    # state -> keywords ending at this state
+
+        for keyword in keywords:
+            self._add(keyword)
+        self._build_links()
+
+    def _add(self, keyword):
+        keyword = keyword.lower()
+        if not keyword or keyword in self._known:
+            return
+        self._known.add(keyword)
+        self.keywords.append(keyword)
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (keyword,)
+
+    def _build_links(self):
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """Yield (start_index, keyword) for every keyword occurrence in text.lower()"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text.lower()):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                yield index - len(keyword) + 1, keyword
+
+    def find_all(self, text):
+        """Return {keyword: [start positions]} for every keyword found in text"""
+        hits = {}
+        for start, keyword in self.iter_matches(text):
+            hits.setdefault(keyword, []).append(start)
+        return hits
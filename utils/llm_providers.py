@@ -0,0 +1,257 @@
+"""
+Pluggable LLM providers for the AI analyzer
+
+Each model offered in the AI tab maps to a provider with the same small
+interface: resolve_model(), generate() and stream(). HTTP providers share one
+keep-alive requests.Session per provider, with a connection pool sized by
+LLM_POOL_SIZE and (connect, read) timeouts from LLM_CONNECT_TIMEOUT and
+AI_REQUEST_TIMEOUT.
+
+- "Google Gemini": google-generativeai, model picked by the Gemini registry
+- "OpenAI GPT-4": OpenRouter's OpenAI-compatible API (OPENROUTER_API_KEY)
+- "Custom Model": any OpenAI-compatible endpoint (CUSTOM_LLM_BASE_URL),
+  by default the local stub server in utils/llm_stub_server.py
+"""
+import os
+import copy
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .gemini_models import get_model_registry
+
+
+class LLMError(Exception):
+    """A provider request failed; status_code is the HTTP status when there is one"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _timeouts():
+    return (
+        float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+        float(os.getenv("AI_REQUEST_TIMEOUT", "90")),
+    )
+
+
+class LLMProvider:
+    """Base class for an LLM backend.
+
+    Subclasses set ``label`` (the name shown in the UI) and implement
+    resolve_model(), generate() and stream().
+    """
+    label = ''
+    missing_config_message = ''
+
+    def is_configured(self):
+        """Return True when the provider has the credentials it needs"""
+        return True
+
+    def resolve_model(self):
+        """Return the model name requests will use, or None when none is available"""
+        raise NotImplementedError
+
+    def supports_model(self, model_name):
+        """Return False when model_name is known to be unavailable to this account"""
+        return True
+
+    def with_model(self, model_name):
+        """Return a provider that sends the same requests to another model of this backend"""
+        clone = copy.copy(self)
+        clone.model = model_name
+        return clone
+
+    def generate(self, prompt, json_mode=False):
+        """Return the full response text for prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt, json_mode=False):
+        """Yield response text chunks for prompt as they arrive"""
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    label = "Google Gemini"
+    missing_config_message = "Google API key is not configured. Please add it to your .env file."
+
+    def __init__(self, model=None):
+        # None follows the registry's preferred model
+        self.model = model
+
+    def is_configured(self):
+        return bool(os.getenv("GOOGLE_API_KEY"))
+
+    def resolve_model(self):
+        # Model discovery is cached process-wide; this only lists models when the cache is stale
+        return self.model or get_model_registry().resolve()
+
+    def supports_model(self, model_name):
+        registry = get_model_registry()
+        if model_name not in registry.preference:
+            # Only preferred models are discovered; let the request decide for any other name
+            return True
+        available = registry.available_models()
+        return not available or model_name in available
+
+    def _request(self, prompt, json_mode, stream):
+        model = get_model_registry().get_model(self.model)
+        if model is None:
+            raise LLMError("Gemini model not available in your API key/account.")
+        generation_config = {"response_mime_type": "application/json"} if json_mode else None
+        try:
+            return model.generate_content(
+                prompt, stream=stream, generation_config=generation_config,
+                request_options={"timeout": _timeouts()[1]}
+            )
+        except Exception as e:
+            raise LLMError(str(e), getattr(e, 'code', None)) from e
+
+    def generate(self, prompt, json_mode=False):
+        response = self._request(prompt, json_mode, stream=False)
+        return response.text if hasattr(response, "text") else str(response)
+
+    def stream(self, prompt, json_mode=False):
+        try:
+            for chunk in self._request(prompt, json_mode, stream=True):
+                try:
+                    yield chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. a safety block) carry nothing to show
+                    continue
+        except LLMError:
+            raise
+        except Exception as e:
+            raise LLMError(str(e), getattr(e, 'code', None)) from e
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Chat completions over an OpenAI-compatible HTTP API"""
+
+    def __init__(self, label, base_url, model, api_key=None, headers=None, require_api_key=False,
+                 missing_config_message=''):
+        self.label = label
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        self.require_api_key = require_api_key
+        self.missing_config_message = missing_config_message
+        self.session = requests.Session()
+        pool_size = int(os.getenv("LLM_POOL_SIZE", "16"))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers or {})
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def is_configured(self):
+        return bool(self.base_url and self.model and (self.api_key or not self.require_api_key))
+
+    def resolve_model(self):
+        return self.model
+
+    def _post(self, prompt, json_mode, stream):
+        payload = {
+            'model': self.model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'stream': stream,
+        }
+        if json_mode:
+            payload['response_format'] = {'type': 'json_object'}
+        try:
+            response = self.session.post(
+                f"{self.base_url}/chat/completions", json=payload, stream=stream, timeout=_timeouts()
+            )
+        except requests.RequestException as e:
+            raise LLMError(f"{self.label} request failed: {e}") from e
+        if response.status_code >= 400:
+            message = response.text[:300]
+            response.close()
+            raise LLMError(f"{self.label} returned HTTP {response.status_code}: {message}", response.status_code)
+        return response
+
+    def generate(self, prompt, json_mode=False):
+        response = self._post(prompt, json_mode, stream=False)
+        try:
+            return response.json()['choices'][0]['message']['content'] or ''
+        except (ValueError, KeyError, IndexError) as e:
+            raise LLMError(f"{self.label} returned an unexpected response: {e}") from e
+
+    def stream(self, prompt, json_mode=False):
+        response = self._post(prompt, json_mode, stream=True)
+        response.encoding = response.encoding or 'utf-8'
+        done = False
+        with response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+                    if done or not line or not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        # Read on to the end of the body so the connection goes back to the pool
+                        done = True
+                        continue
+                    try:
+                        delta = json.loads(data)['choices'][0].get('delta', {})
+                    except (ValueError, KeyError, IndexError):
+                        continue
+                    if delta.get('content'):
+                        yield delta['content']
+            except requests.RequestException as e:
+                raise LLMError(f"{self.label} stream failed: {e}") from e
+
+
+def _openrouter_provider():
+    return OpenAICompatibleProvider(
+        "OpenAI GPT-4",
+        os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+        os.getenv("OPENROUTER_MODEL", "openai/gpt-4o"),
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        headers={'X-Title': 'Smart Resume AI'},
+        require_api_key=True,
+        missing_config_message="OpenRouter API key is not configured. Please add OPENROUTER_API_KEY to your .env file."
+    )
+
+
+def _custom_provider():
+    return OpenAICompatibleProvider(
+        "Custom Model",
+        os.getenv("CUSTOM_LLM_BASE_URL", "http://127.0.0.1:8089/v1"),
+        os.getenv("CUSTOM_LLM_MODEL", "resume-stub"),
+        api_key=os.getenv("CUSTOM_LLM_API_KEY"),
+        missing_config_message="Custom model is not configured. Please set CUSTOM_LLM_BASE_URL and CUSTOM_LLM_MODEL."
+    )
+
+
+# UI label -> provider factory
+PROVIDER_FACTORIES = {
+    "Google Gemini": GeminiProvider,
+    "OpenAI GPT-4": _openrouter_provider,
+    "Custom Model": _custom_provider,
+}
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register_provider(label, factory):
+    """Add (or replace) the provider offered under a UI label"""
+    with _providers_lock:
+        PROVIDER_FACTORIES[label] = factory
+        _providers.pop(label, None)
+
+
+def get_provider(label):
+    """Return the process-wide provider for a UI label, or None for unknown labels"""
+    with _providers_lock:
+        if label not in _providers:
+            factory = PROVIDER_FACTORIES.get(label)
+            if factory is None:
+                return None
+            _providers[label] = factory()
+        return _providers[label]
@@ -0,0 +1,207 @@
+"""
+Local OpenAI-compatible stub LLM server
+
+Serves canned resume analyses from /v1/chat/completions (streaming and
+non-streaming, markdown or JSON mode) with configurable latency, so load
+tests and CI can exercise the whole AI path without network access or API
+keys. Point the "Custom Model" provider at it (the default
+CUSTOM_LLM_BASE_URL) and run:
+
+    python -m utils.llm_stub_server --port 8089 --latency 0.5 --chunk-delay 0.02
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_ANALYSIS = """## Overall Assessment
+The resume is clearly organized and easy to scan. Experience is presented in reverse chronological order with concise bullet points.
+## Professional Profile Analysis
+The candidate shows a steady progression with growing responsibility across roles.
+## Skills Analysis
+- **Current Skills**: Python, SQL, Git, Communication
+- **Skill Proficiency**: Strong in Python and SQL based on the projects described.
+- **Missing Skills**: Docker, Cloud platforms
+## Experience Analysis
+Bullet points use action verbs, but few of them quantify impact.
+## Education Analysis
+The degree is relevant to the target role.
+## Key Strengths
+- Clear structure and formatting
+- Relevant technical skills
+- Consistent career progression
+## Areas for Improvement
+- Quantify achievements with metrics
+- Add a short professional summary
+- Link to a portfolio or GitHub profile
+## ATS Optimization Assessment
+ATS Score: 74/100
+- Add role-specific keywords from the job description
+## Recommended Courses/Certifications
+- AWS Certified Cloud Practitioner
+- Docker and Kubernetes fundamentals
+## Resume Score
+Resume Score: 78/100
+"""
+
+STUB_JSON = {
+    "overall_assessment": "The resume is clearly organized and easy to scan.",
+    "professional_profile": "The candidate shows a steady progression with growing responsibility.",
+    "skills_analysis": {
+        "current_skills": ["Python", "SQL", "Git"],
+        "skill_proficiency": "Strong in Python and SQL.",
+        "missing_skills": ["Docker", "Cloud platforms"],
+    },
+    "experience_analysis": "Bullet points use action verbs, but few quantify impact.",
+    "education_analysis": "The degree is relevant to the target role.",
+    "strengths": ["Clear structure and formatting", "Relevant technical skills", "Consistent career progression"],
+    "weaknesses": ["Quantify achievements with metrics", "Add a short professional summary",
+                   "Link to a portfolio or GitHub profile"],
+    "ats_optimization": "Add role-specific keywords from the job description.",
+    "ats_score": 74,
+    "suggestions": ["AWS Certified Cloud Practitioner", "Docker and Kubernetes fundamentals"],
+    "resume_score": 78,
+    "role_alignment": "",
+    "job_match": "",
+    "missing_requirements": [],
+}
+
+# Packed bulk scoring prompts label each resume "=== RESUME R1 ===" and so on
+_PACKED_ID = re.compile(r'^=== RESUME (\S+) ===$', re.MULTILINE)
+
+
+def packed_response(ids):
+    """Canned packed scoring answer with one entry per resume id"""
+    return {'results': [
+        {'id': resume_id, 'resume_score': STUB_JSON['resume_score'], 'ats_score': STUB_JSON['ats_score'],
+         'strengths': STUB_JSON['strengths'], 'weaknesses': STUB_JSON['weaknesses']}
+        for resume_id in ids
+    ]}
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, chunk_delay=0.0, chunk_size=40, error_rate=0.0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.error_rate = error_rate
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = StubConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('/v1/models', '/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'resume-stub', 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'invalid JSON body'}})
+            return
+
+        config = self.config
+        with config.lock:
+            config.requests += 1
+        time.sleep(config.latency)
+        if config.error_rate and random.random() < config.error_rate:
+            self._send_json(503, {'error': {'message': 'stub overloaded'}})
+            return
+
+        json_mode = (request.get('response_format') or {}).get('type') == 'json_object'
+        messages = request.get('messages') or [{}]
+        packed_ids = _PACKED_ID.findall(str(messages[-1].get('content', '')))
+        if json_mode and packed_ids:
+            content = json.dumps(packed_response(packed_ids))
+        else:
+            content = json.dumps(STUB_JSON) if json_mode else STUB_ANALYSIS
+        model = request.get('model', 'resume-stub')
+        if request.get('stream'):
+            self._stream(content, model)
+        else:
+            self._send_json(200, {
+                'id': 'stub-completion',
+                'object': 'chat.completion',
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+            })
+
+    def _stream(self, content, model):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        size = max(1, self.config.chunk_size)
+        for start in range(0, len(content), size):
+            event = {
+                'id': 'stub-completion',
+                'object': 'chat.completion.chunk',
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': content[start:start + size]}}],
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            time.sleep(self.config.chunk_delay)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+
+def make_server(host='127.0.0.1', port=8089, latency=0.0, chunk_delay=0.0, chunk_size=40, error_rate=0.0):
+    """Build a stub server (call serve_forever() or run it in a thread)"""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'config': StubConfig(latency, chunk_delay, chunk_size, error_rate)
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM for offline testing.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before the first byte of each response")
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument('--chunk-size', type=int, default=40, help="Characters per streamed chunk")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.chunk_delay, args.chunk_size, args.error_rate)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Offline CPU-only resume scoring model
+
+A small scikit-learn regressor that predicts the resume score and ATS score
+the LLM would give, from the keyword analyzer's features. Training examples
+(features plus the AI's scores) are collected whenever an AI analysis
+succeeds (written by a background thread, one row per resume, role and
+model) and can be backfilled from bulk AI jobs. Trained models are saved
+as versioned joblib files under LOCAL_MODEL_DIR, with latest.json pointing
+at the current one (or pin a version with LOCAL_MODEL_VERSION).
+
+    python -m utils.local_scoring_model train --db resume_data.db --backfill
+    python -m utils.local_scoring_model benchmark
+"""
+import os
+import sys
+import json
+import math
+import time
+import queue
+import hashlib
+import sqlite3
+import argparse
+import datetime
+import threading
+
+from .resume_analyzer import ResumeAnalyzer
+from .analysis_cache import normalize_resume_text
+
+LOCAL_MODEL_LABEL = "Local Model"
+LOCAL_MODEL_DIR = os.getenv("LOCAL_MODEL_DIR", os.path.join("models", "local_scoring"))
+# Bump when FEATURE_NAMES or their meaning changes; models of another schema are refused
+FEATURE_VERSION = 1
+FEATURE_NAMES = [
+    'ats_score', 'keyword_score', 'format_score', 'section_score',
+    'contact_score', 'summary_score', 'skills_score', 'experience_score', 'education_score',
+    'found_skills', 'missing_skills', 'suggestions', 'education_entries', 'experience_entries',
+    'project_entries', 'skill_entries', 'log_words',
+]
+MIN_EXAMPLES = 30
+# Provider labels whose scores are collected; the "Custom Model" stub used for tests and load runs is not
+LOCAL_MODEL_PROVIDERS = [
+    label.strip() for label in os.getenv("LOCAL_MODEL_PROVIDERS", "Google Gemini,OpenAI GPT-4").split(",")
+    if label.strip()
+]
+
+
+def provider_label(model):
+    """Provider label of a model_used string, e.g. Google Gemini for "Google Gemini (gemini-2.5-flash)"."""
+    return (model or '').split(' (')[0]
+
+
+def _count(value):
+    return len(value) if isinstance(value, (list, set, tuple)) else 0
+
+
+def extract_features(heuristic, text):
+    """Feature vector (ordered like FEATURE_NAMES) from a ResumeAnalyzer result and the resume text"""
+    keyword_match = heuristic.get('keyword_match', {})
+    section_scores = heuristic.get('section_scores', {})
+    return [
+        float(heuristic.get('ats_score', 0)),
+        float(keyword_match.get('score', 0)),
+        float(heuristic.get('format_score', 0)),
+        float(heuristic.get('section_score', 0)),
+        float(section_scores.get('contact', 0)),
+        float(section_scores.get('summary', 0)),
+        float(section_scores.get('skills', 0)),
+        float(section_scores.get('experience', 0)),
+        float(section_scores.get('education', 0)),
+        float(_count(keyword_match.get('found_skills'))),
+        float(_count(keyword_match.get('missing_skills'))),
+        float(_count(heuristic.get('suggestions'))),
+        float(_count(heuristic.get('education'))),
+        float(_count(heuristic.get('experience'))),
+        float(_count(heuristic.get('projects'))),
+        float(_count(heuristic.get('skills'))),
+        math.log1p(len((text or '').split())),
+    ]
+
+
+def example_hash(text, job_role=None, model=None):
+    """Key that identifies repeat analyses of the same resume for the same role and model"""
+    parts = [normalize_resume_text(text), job_role or '', model or '']
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class TrainingStore:
+    """Training examples for the local model, stored in SQLite"""
+
+    def __init__(self, db_path='resume_data.db'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scoring_examples (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    feature_version INTEGER NOT NULL,
+                    features TEXT NOT NULL,
+                    resume_score INTEGER NOT NULL,
+                    ats_score INTEGER NOT NULL,
+                    job_role TEXT,
+                    model TEXT,
+                    source TEXT,
+                    content_hash TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            existing_cols = [row[1] for row in conn.execute("PRAGMA table_info(scoring_examples)")]
+            if 'content_hash' not in existing_cols:
+                conn.execute("ALTER TABLE scoring_examples ADD COLUMN content_hash TEXT")
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_scoring_examples_hash
+                ON scoring_examples (content_hash)
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def add(self, features, resume_score, ats_score, job_role=None, model=None, source='analysis',
+            content_hash=None):
+        """Store one example; examples without both scores, or whose content_hash is stored, are ignored"""
+        if not resume_score or not ats_score:
+            return False
+        with self._lock:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                cursor = conn.execute('''
+                    INSERT OR IGNORE INTO scoring_examples
+                    (feature_version, features, resume_score, ats_score, job_role, model, source, content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (FEATURE_VERSION, json.dumps(features), int(resume_score), int(ats_score),
+                      job_role, model, source, content_hash))
+                conn.commit()
+                return cursor.rowcount > 0
+            except sqlite3.Error as e:
+                print(f"Error saving scoring example: {e}")
+                return False
+            finally:
+                conn.close()
+
+    def load(self, provider):
+        """Return (features, targets) for the current feature version's examples scored by provider"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            rows = conn.execute('''
+                SELECT features, resume_score, ats_score FROM scoring_examples
+                WHERE feature_version = ? AND (model = ? OR model LIKE ?)
+            ''', (FEATURE_VERSION, provider, provider + ' (%')).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row[0]) for row in rows], [[row[1], row[2]] for row in rows]
+
+    def count(self, provider):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            return conn.execute('''
+                SELECT COUNT(*) FROM scoring_examples
+                WHERE feature_version = ? AND (model = ? OR model LIKE ?)
+            ''', (FEATURE_VERSION, provider, provider + ' (%')).fetchone()[0]
+        finally:
+            conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_training_store():
+    """Return the process-wide training store (LOCAL_MODEL_DB, default resume_data.db)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TrainingStore(os.getenv("LOCAL_MODEL_DB", "resume_data.db"))
+        return _store
+
+
+class ExampleWriter:
+    """Background thread that featurizes and stores training examples off the request path.
+
+    When more than max_pending examples are waiting, new ones are dropped
+    (and counted) unless block is set, as batch runs do: there every example
+    matters and waiting for the writer costs nothing the user sees.
+    """
+
+    def __init__(self, store, max_pending=1000, block=False):
+        self.store = store
+        self.block = block
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='scoring-examples', daemon=True)
+        self._thread.start()
+
+    def submit(self, text, role_info, resume_score, ats_score, job_role=None, model=None, heuristic=None):
+        """Queue one example; returns False when it was dropped because the writer is too far behind"""
+        try:
+            self._queue.put((text, role_info, resume_score, ats_score, job_role, model, heuristic), block=self.block)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                print(f"Training example queue is full; dropped {self.dropped} examples so far")
+            return False
+
+    def pending(self):
+        """Number of examples queued but not yet written"""
+        return self._queue.unfinished_tasks
+
+    def join(self):
+        """Block until every queued example has been written (the thread is a daemon, so call before exiting)"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(*item)
+            except Exception as e:
+                print(f"Error recording scoring example: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, text, role_info, resume_score, ats_score, job_role, model, heuristic):
+        if heuristic is None:
+            heuristic = ResumeAnalyzer().analyze_resume({'raw_text': text}, role_info or {})
+        if 'error' in heuristic or heuristic.get('document_type') != 'resume':
+            return
+        self.store.add(extract_features(heuristic, text), resume_score, ats_score, job_role, model,
+                       content_hash=example_hash(text, job_role, model))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_example_writer():
+    """Return the process-wide writer for the training store"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ExampleWriter(get_training_store())
+        return _writer
+
+
+def record_example(text, role_info, resume_score, ats_score, job_role=None, model=None, heuristic=None):
+    """Queue a resume the AI just scored as a training example.
+
+    heuristic is the ResumeAnalyzer result for the same text and role when the
+    caller already has it; otherwise the writer thread computes it. Only
+    scores from LOCAL_MODEL_PROVIDERS are kept.
+    """
+    if os.getenv("LOCAL_MODEL_COLLECT", "true").lower() != "true":
+        return
+    if not resume_score or not ats_score or provider_label(model) not in LOCAL_MODEL_PROVIDERS:
+        return
+    try:
+        get_example_writer().submit(text, role_info, resume_score, ats_score, job_role, model, heuristic)
+    except Exception as e:
+        print(f"Error recording scoring example: {e}")
+
+
+def backfill_from_bulk_jobs(store, db_path='resume_data.db'):
+    """Add examples from finished bulk AI results whose resume files are still on disk"""
+    from config.job_roles import JOB_ROLES
+    from .text_extraction import extract_text
+
+    roles = {name: info for category in JOB_ROLES.values() for name, info in category.items()}
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        rows = conn.execute('''
+            SELECT job_id, file, resume_score, ats_score FROM bulk_ai_results
+            WHERE status = 'done' AND resume_score > 0 AND ats_score > 0
+        ''').fetchall()
+    except sqlite3.Error:
+        rows = []
+    finally:
+        conn.close()
+    analyzer = ResumeAnalyzer()
+    added = 0
+    for job_id, path, resume_score, ats_score in rows:
+        if not os.path.exists(path):
+            continue
+        # Default bulk job ids are "role|model label|output"
+        parts = job_id.split('|')
+        role_name = parts[0]
+        label = parts[1] if len(parts) > 2 else None
+        if label not in LOCAL_MODEL_PROVIDERS:
+            continue
+        try:
+            text = extract_text(path)['text']
+        except Exception:
+            continue
+        heuristic = analyzer.analyze_resume({'raw_text': text}, roles.get(role_name, {}))
+        if 'error' in heuristic or heuristic.get('document_type') != 'resume':
+            continue
+        added += store.add(extract_features(heuristic, text), resume_score, ats_score, role_name, label,
+                           source='bulk', content_hash=example_hash(text, role_name, label))
+    return added
+
+
+def train(store, provider=None, model_dir=LOCAL_MODEL_DIR):
+    """Fit a new model version on one provider's examples and make it the latest; returns its metadata.
+
+    Providers score differently, so their examples are never mixed; provider
+    defaults to the first of LOCAL_MODEL_PROVIDERS.
+    """
+    import joblib
+    import numpy as np
+    import sklearn
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.model_selection import cross_val_predict
+
+    provider = provider or LOCAL_MODEL_PROVIDERS[0]
+    features, targets = store.load(provider)
+    if len(features) < MIN_EXAMPLES:
+        raise ValueError(f"Need at least {MIN_EXAMPLES} {provider} examples to train, have {len(features)}")
+    X = np.asarray(features, dtype=np.float64)
+    y = np.asarray(targets, dtype=np.float64)
+
+    models = []
+    metrics = {}
+    for column, name in enumerate(('resume_score', 'ats_score')):
+        # Shallow trees keep single-row prediction well under a millisecond
+        model = GradientBoostingRegressor(n_estimators=150, max_depth=3, learning_rate=0.05, random_state=0)
+        predicted = cross_val_predict(model, X, y[:, column], cv=min(5, len(X)))
+        metrics[f"{name}_mae"] = round(float(np.mean(np.abs(predicted - y[:, column]))), 2)
+        models.append(model.fit(X, y[:, column]))
+
+    version = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    metadata = {
+        'version': version,
+        'feature_version': FEATURE_VERSION,
+        'feature_names': FEATURE_NAMES,
+        'provider': provider,
+        'examples': len(features),
+        'metrics': metrics,
+        'sklearn_version': sklearn.__version__,
+        'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump({'metadata': metadata, 'models': models}, os.path.join(model_dir, f"{version}.joblib"))
+    with open(os.path.join(model_dir, 'latest.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+class LocalScoringModel:
+    """A loaded model version that predicts (resume_score, ats_score) from features"""
+
+    def __init__(self, models, metadata):
+        self.models = models
+        self.metadata = metadata
+        self.version = metadata['version']
+
+    @classmethod
+    def load(cls, model_dir=LOCAL_MODEL_DIR, version=None):
+        """Load a model version (the latest by default); returns None when there is none"""
+        import joblib
+
+        if version is None:
+            try:
+                with open(os.path.join(model_dir, 'latest.json'), encoding='utf-8') as f:
+                    version = json.load(f)['version']
+            except (OSError, ValueError, KeyError):
+                return None
+        path = os.path.join(model_dir, f"{version}.joblib")
+        if not os.path.exists(path):
+            return None
+        bundle = joblib.load(path)
+        metadata = bundle['metadata']
+        if metadata.get('feature_version') != FEATURE_VERSION or metadata.get('feature_names') != FEATURE_NAMES:
+            print(f"Local scoring model {version} was trained on other features; retrain it")
+            return None
+        return cls(bundle['models'], metadata)
+
+    def predict(self, features):
+        """Return (resume_score, ats_score) for one feature vector"""
+        import numpy as np
+
+        X = np.asarray([features], dtype=np.float64)
+        return tuple(int(round(max(0.0, min(100.0, model.predict(X)[0])))) for model in self.models)
+
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_local_model(reload=False):
+    """Return the process-wide local model (LOCAL_MODEL_VERSION pins a version), or None if untrained"""
+    global _model, _model_loaded
+    with _model_lock:
+        if reload or not _model_loaded:
+            _model = LocalScoringModel.load(version=os.getenv("LOCAL_MODEL_VERSION") or None)
+            _model_loaded = True
+        return _model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or benchmark the offline resume scoring model.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train_parser = subparsers.add_parser('train', help="Fit a new model version on the stored examples")
+    train_parser.add_argument('--db', default=os.getenv("LOCAL_MODEL_DB", "resume_data.db"))
+    train_parser.add_argument('--backfill', action='store_true',
+                              help="First add examples from finished bulk AI jobs (batch_screen.py --ai)")
+    train_parser.add_argument('--provider', default=None,
+                              help="Train on this provider's scores (default: first of LOCAL_MODEL_PROVIDERS)")
+    subparsers.add_parser('benchmark', help="Measure single-resume prediction latency of the latest model")
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        store = TrainingStore(args.db)
+        if args.backfill:
+            print(f"Backfilled {backfill_from_bulk_jobs(store, args.db)} examples from bulk AI jobs")
+        try:
+            metadata = train(store, args.provider)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print(f"Trained model {metadata['version']} on {metadata['examples']} {metadata['provider']} examples: "
+              f"{metadata['metrics']}")
+    else:
+        model = get_local_model()
+        if model is None:
+            print("No trained model found; run the train command first", file=sys.stderr)
+            sys.exit(1)
+        features = [50.0] * len(FEATURE_NAMES)
+        model.predict(features)
+        runs = 200
+        started = time.perf_counter()
+        for _ in range(runs):
+            model.predict(features)
+        print(f"Model {model.version}: {(time.perf_counter() - started) * 1000 / runs:.2f} ms per prediction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Model cascade: fastest model first, stronger models only when needed
+
+With AI_CASCADE_ENABLED=true a provider that has a cascade configured (e.g.
+GEMINI_CASCADE_MODELS=gemini-2.5-flash,gemini-2.5-pro) answers with its first
+model, and the analyzer moves to the next one only when the response fails
+validate_analysis() (missing sections, no parseable scores, thin lists) or
+the request errors. Escalations are counted so the cascade can be tuned.
+"""
+import os
+import threading
+
+CASCADE_ENABLED = os.getenv("AI_CASCADE_ENABLED", "false").lower() == "true"
+
+
+def _models(env, default=""):
+    return [name.strip() for name in os.getenv(env, default).split(",") if name.strip()]
+
+
+# Provider label -> models from fastest to strongest
+CASCADE_MODELS = {
+    "Google Gemini": _models("GEMINI_CASCADE_MODELS", "gemini-2.5-flash,gemini-2.5-pro"),
+    "OpenAI GPT-4": _models("OPENROUTER_CASCADE_MODELS"),
+}
+
+_stats = {'runs': 0, 'escalated_runs': 0, 'escalations': 0, 'answered_by': {}, 'reasons': {}}
+_stats_lock = threading.Lock()
+
+
+def cascade_tiers(provider):
+    """Return [(model_name, provider)] fastest first, or [] when the provider runs without a cascade"""
+    if not CASCADE_ENABLED:
+        return []
+    models = [name for name in CASCADE_MODELS.get(provider.label, []) if provider.supports_model(name)]
+    if len(models) < 2:
+        return []
+    return [(name, provider.with_model(name)) for name in models]
+
+
+def _reason(problem):
+    """Group problems by kind ("only 2 Key Strengths" and "only 1 Key Strengths" are one reason)"""
+    if problem.startswith('error'):
+        return 'error'
+    if problem.startswith('only '):
+        return 'few ' + problem.split(' ', 2)[2]
+    return problem
+
+
+def record_cascade(answered_by, escalations):
+    """Record one cascaded analysis: the model that answered and the (model, problems) it escalated past"""
+    with _stats_lock:
+        _stats['runs'] += 1
+        _stats['escalated_runs'] += bool(escalations)
+        _stats['escalations'] += len(escalations)
+        _stats['answered_by'][answered_by] = _stats['answered_by'].get(answered_by, 0) + 1
+        for _, problems in escalations:
+            for problem in problems:
+                reason = _reason(problem)
+                _stats['reasons'][reason] = _stats['reasons'].get(reason, 0) + 1
+
+
+def get_cascade_stats():
+    """Return process-wide cascade counts, including the share of analyses that escalated"""
+    with _stats_lock:
+        stats = dict(_stats, answered_by=dict(_stats['answered_by']), reasons=dict(_stats['reasons']))
+    stats['escalation_rate'] = round(stats['escalated_runs'] / stats['runs'], 3) if stats['runs'] else 0.0
+    return stats
@@ -0,0 +1,152 @@
+"""
+OCR fallback for scanned resume pages that have no text layer
+
+Pages are rasterized with pdf2image and read with Tesseract in worker
+processes, one page per task, so a scanned document is OCR'd in parallel.
+Results are cached per page (document hash + page number + DPI).
+"""
+import os
+import time
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future, TimeoutError as FutureTimeoutError
+
+from .extraction_cache import ExtractionCache
+
+try:
+    from pdf2image import convert_from_bytes
+    import pytesseract
+    ocr_available = True
+except ImportError:
+    ocr_available = False
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "120"))
+
+# Windows builds ship poppler inside the repository
+_BUNDLED_POPPLER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "poppler", "poppler-24.08.0", "Library", "bin"
+)
+POPPLER_PATH = os.getenv("POPPLER_PATH") or (
+    _BUNDLED_POPPLER if os.name == "nt" and os.path.isdir(_BUNDLED_POPPLER) else None
+)
+
+_ocr_cache = ExtractionCache(
+    max_entries=int(os.getenv("OCR_CACHE_SIZE", "512")),
+    cache_dir=os.getenv("OCR_CACHE_DIR") or None
+)
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+_binaries_found = None
+_binaries_lock = threading.Lock()
+
+
+def _binaries_installed():
+    """Return True when the tesseract and poppler executables can be found (checked once per process)"""
+    global _binaries_found
+    with _binaries_lock:
+        if _binaries_found is None:
+            try:
+                pytesseract.get_tesseract_version()
+                tesseract = True
+            except Exception:
+                tesseract = False
+            poppler = shutil.which('pdftoppm', path=POPPLER_PATH) is not None
+            _binaries_found = tesseract and poppler
+            if not _binaries_found:
+                missing = [name for name, found in (('tesseract', tesseract), ('poppler', poppler)) if not found]
+                print(f"OCR disabled: {' and '.join(missing)} not installed")
+        return _binaries_found
+
+
+def is_enabled():
+    """Return True when OCR is switched on and its Python packages and executables are installed"""
+    return OCR_ENABLED and ocr_available and _binaries_installed()
+
+
+def _get_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _ocr_pool
+
+
+def _ocr_page(content, page_number, dpi, poppler_path):
+    """Worker entry point: rasterize one page (0-based) and OCR it"""
+    images = convert_from_bytes(
+        content, dpi=dpi, first_page=page_number + 1, last_page=page_number + 1,
+        poppler_path=poppler_path
+    )
+    return '\n'.join(pytesseract.image_to_string(image) for image in images)
+
+
+def _page_key(content, page_number, dpi):
+    return ExtractionCache.make_key(content, f"ocr-p{page_number}-{dpi}")
+
+
+def _cache_result(key, future):
+    if not future.cancelled() and future.exception() is None:
+        _ocr_cache.put(key, {'text': future.result()})
+
+
+def _run_inline(content, page_number, dpi):
+    future = Future()
+    try:
+        future.set_result(_ocr_page(content, page_number, dpi, POPPLER_PATH))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def submit_ocr_pages(content, page_numbers, dpi=None, inline=False):
+    """Start OCR for the given pages without waiting.
+
+    Returns {page_number: Future} whose results are the page texts. Cached
+    pages come back as already-completed futures. With inline=True the pages
+    are OCR'd in this process instead of the worker pool (for callers that
+    are already running inside a worker).
+    """
+    dpi = dpi or OCR_DPI
+    futures = {}
+    for page_number in page_numbers:
+        key = _page_key(content, page_number, dpi)
+        cached = _ocr_cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached['text'])
+        elif inline:
+            future = _run_inline(content, page_number, dpi)
+            _cache_result(key, future)
+        else:
+            future = _get_ocr_pool().submit(_ocr_page, content, page_number, dpi, POPPLER_PATH)
+            future.add_done_callback(lambda f, key=key: _cache_result(key, f))
+        futures[page_number] = future
+    return futures
+
+
+def ocr_pages(content, page_numbers, dpi=None, timeout=None, inline=False):
+    """OCR the given pages in parallel and return {page_number: text}.
+
+    Pages that fail, come back without text or do not finish within the
+    timeout (for the whole document, not per page) are left out.
+    """
+    if not page_numbers or not is_enabled():
+        return {}
+    futures = submit_ocr_pages(content, page_numbers, dpi, inline)
+    deadline = time.monotonic() + (OCR_TIMEOUT if timeout is None else timeout)
+    texts = {}
+    for page_number, future in futures.items():
+        try:
+            text = future.result(timeout=max(0, deadline - time.monotonic()))
+            if text.strip():
+                texts[page_number] = text
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"OCR timed out on page {page_number + 1}")
+        except Exception as e:
+            print(f"OCR failed on page {page_number + 1}: {e}")
+    return texts
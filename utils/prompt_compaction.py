@@ -0,0 +1,150 @@
+"""
+Resume text compaction before LLM calls
+
+Extracted resume text carries runs of whitespace, page numbers and
+boilerplate, all of which cost prompt tokens and generation latency (headers
+and footers repeated on every page are already dropped by extract_text(),
+which still knows where the page boundaries are). compact_resume_text() strips that noise and enforces
+a token budget (AI_PROMPT_TOKEN_BUDGET), trimming low-priority sections
+before the ones the analysis depends on.
+"""
+import os
+import re
+import threading
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "6000"))
+
+# Rough token estimate for English prose with BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+# Section headings, most important first; sections are trimmed from the end of this list
+SECTION_PRIORITY = [
+    ('experience', ('experience', 'work experience', 'professional experience', 'employment',
+                    'employment history', 'work history', 'internships', 'internship')),
+    ('skills', ('skills', 'technical skills', 'core competencies', 'technologies', 'tools')),
+    ('summary', ('summary', 'professional summary', 'profile', 'objective', 'career objective', 'about me')),
+    ('projects', ('projects', 'academic projects', 'personal projects', 'key projects')),
+    ('education', ('education', 'academic background', 'qualifications', 'educational qualification')),
+    ('certifications', ('certifications', 'certificates', 'licenses', 'courses', 'training')),
+    ('achievements', ('achievements', 'awards', 'honors', 'accomplishments', 'publications')),
+    ('other', ('languages', 'activities', 'extracurricular activities', 'volunteering', 'leadership')),
+    ('personal', ('hobbies', 'interests', 'personal details', 'personal information',
+                  'declaration', 'references')),
+]
+_HEADINGS = {
+    heading: rank for rank, (_, headings) in enumerate(SECTION_PRIORITY) for heading in headings
+}
+
+_INLINE_WHITESPACE = re.compile(r'[ \t\u00a0\u2000-\u200b]+')
+_PAGE_NUMBER = re.compile(r'^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$', re.IGNORECASE)
+_BOILERPLATE = re.compile(
+    r'^(references (are )?available (up)?on request\.?|curriculum vitae|resume|r[eé]sum[eé])$',
+    re.IGNORECASE
+)
+TRUNCATION_MARKER = '[...]'
+
+_stats = {'requests': 0, 'original_tokens': 0, 'compacted_tokens': 0, 'truncated': 0}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting (about 4 characters per token)"""
+    return -(-len(text or '') // CHARS_PER_TOKEN)
+
+
+def _heading_rank(line):
+    """Return the priority rank of a section heading line, or None for body lines"""
+    if len(line) > 40:
+        return None
+    return _HEADINGS.get(line.lower().strip(' :-|•*#'))
+
+
+def _clean_lines(text):
+    """Collapse whitespace, drop page numbers and boilerplate"""
+    lines = [_INLINE_WHITESPACE.sub(' ', line).strip() for line in (text or '').splitlines()]
+    cleaned = []
+    for line in lines:
+        if not line:
+            # Keep at most one blank line in a row
+            if cleaned and cleaned[-1]:
+                cleaned.append('')
+            continue
+        if _PAGE_NUMBER.match(line) or _BOILERPLATE.match(line):
+            continue
+        cleaned.append(line)
+    while cleaned and not cleaned[-1]:
+        cleaned.pop()
+    return cleaned
+
+
+def _split_sections(lines):
+    """Split lines into [rank, lines] blocks; the header block before any heading ranks first"""
+    sections = [[-1, []]]
+    for line in lines:
+        rank = _heading_rank(line)
+        if rank is not None:
+            sections.append([rank, [line]])
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def _fit_budget(sections, max_tokens):
+    """Trim sections, lowest priority first, until the text fits max_tokens.
+
+    Returns the names of the sections that were trimmed.
+    """
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    total = sum(len(line) + 1 for _, lines in sections for line in lines)
+    trimmed = []
+    for section in sorted(sections, key=lambda s: s[0], reverse=True):
+        if total <= budget_chars:
+            break
+        rank, lines = section
+        # Keep the heading (or first line) so the model still sees the section exists
+        keep = 1 if rank >= 0 else min(len(lines), 3)
+        removed = False
+        while len(lines) > keep and total > budget_chars:
+            total -= len(lines.pop()) + 1
+            removed = True
+        if removed:
+            lines.append(TRUNCATION_MARKER)
+            total += len(TRUNCATION_MARKER) + 1
+            trimmed.append(SECTION_PRIORITY[rank][0] if rank >= 0 else 'header')
+    return trimmed
+
+
+def compact_resume_text(text, max_tokens=None):
+    """Return (compacted_text, stats) for a resume about to be sent to an LLM.
+
+    stats holds the before/after token estimates and the sections trimmed
+    to meet the budget.
+    """
+    max_tokens = PROMPT_TOKEN_BUDGET if max_tokens is None else max_tokens
+    original_tokens = estimate_tokens(text)
+    sections = _split_sections(_clean_lines(text))
+    trimmed = _fit_budget(sections, max_tokens) if max_tokens > 0 else []
+    compacted = '\n'.join(line for _, lines in sections for line in lines).strip()
+    if max_tokens > 0 and estimate_tokens(compacted) > max_tokens:
+        # A single oversized section (or no headings at all): hard cut
+        compacted = compacted[:max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 1] + '\n' + TRUNCATION_MARKER
+        trimmed.append('text')
+
+    stats = {
+        'original_tokens': original_tokens,
+        'compacted_tokens': estimate_tokens(compacted),
+        'token_budget': max_tokens,
+        'truncated_sections': trimmed,
+    }
+    with _stats_lock:
+        _stats['requests'] += 1
+        _stats['original_tokens'] += stats['original_tokens']
+        _stats['compacted_tokens'] += stats['compacted_tokens']
+        _stats['truncated'] += bool(trimmed)
+    return compacted, stats
+
+
+def get_compaction_stats():
+    """Return process-wide totals of the token estimates recorded so far"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,241 @@
+"""
+Client-side rate limiting and circuit breaking for LLM calls
+
+Every provider gets one process-wide LLMGuard: a token bucket sized to the
+provider quota (LLM_RATE_LIMIT_RPM requests per minute, LLM_RATE_LIMIT_BURST
+at once) whose rate is halved on each HTTP 429 and grows back on success, and
+a circuit breaker that opens after CIRCUIT_FAILURE_THRESHOLD consecutive
+upstream failures (429, 5xx, timeouts) and fails fast for
+CIRCUIT_RESET_SECONDS before letting a single probe request through.
+"""
+import os
+import time
+import threading
+
+from .llm_providers import LLMError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class RateLimitExceeded(LLMError):
+    """No request slot became free within the allowed wait"""
+
+    def __init__(self, message):
+        super().__init__(message, 429)
+
+
+class CircuitOpenError(LLMError):
+    """The upstream is considered unhealthy and calls fail fast"""
+
+    def __init__(self, message):
+        super().__init__(message, 503)
+
+
+def is_upstream_failure(error):
+    """Return True for errors that say the upstream is throttling or unhealthy"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        # Connection errors and timeouts carry no HTTP status
+        return True
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return True
+    return status == 429 or status >= 500
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate backs off on 429s and recovers on success"""
+
+    def __init__(self, rate_per_minute=60, burst=5, min_rate_per_minute=1):
+        self.max_rate = rate_per_minute / 60.0
+        self.min_rate = min(min_rate_per_minute / 60.0, self.max_rate)
+        self.rate = self.max_rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to timeout seconds; returns False if none came free"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    def on_throttled(self, cooldown=None):
+        """Halve the rate after a 429 and hold new requests for a short cooldown"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + (cooldown if cooldown is not None else 1 / self.rate))
+            self.throttled += 1
+
+    def on_success(self):
+        """Grow the rate back towards the configured quota"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate_per_minute': round(self.rate * 60, 1),
+                'max_rate_per_minute': round(self.max_rate * 60, 1),
+                'tokens': round(self.tokens, 2),
+                'throttled': self.throttled,
+            }
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open probe -> closed"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go out now"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probing:
+                # Let exactly one probe through; its outcome closes or reopens the circuit
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+    def release(self):
+        """Forget a half-open probe that ended without a verdict (e.g. it was cancelled)"""
+        with self._lock:
+            self.probing = False
+
+    def retry_in(self):
+        """Seconds until an open circuit lets a probe through"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'trips': self.trips, 'rejected': self.rejected}
+
+
+class LLMGuard:
+    """Rate limiter plus circuit breaker in front of one provider's calls"""
+
+    def __init__(self, name, bucket, breaker, max_wait=30.0):
+        self.name = name
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_wait = max_wait
+
+    def call(self, fn):
+        """Run fn() if the circuit and the rate limit allow it.
+
+        Raises CircuitOpenError while the upstream is unhealthy and
+        RateLimitExceeded when no slot frees up within max_wait seconds.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"{self.name} is temporarily unavailable; retrying in {int(self.breaker.retry_in()) + 1}s."
+            )
+        if not self.bucket.acquire(timeout=self.max_wait):
+            self.breaker.release()
+            raise RateLimitExceeded(f"{self.name} rate limit reached; please try again shortly.")
+        try:
+            result = fn()
+        except LLMError as e:
+            if is_upstream_failure(e):
+                if getattr(e, 'status_code', None) == 429:
+                    self.bucket.on_throttled()
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            # Cancellation or a bug on our side says nothing about the upstream
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        self.bucket.on_success()
+        return result
+
+    def stats(self):
+        return dict(self.bucket.stats(), **self.breaker.stats())
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_llm_guard(name):
+    """Return the process-wide guard for a provider label"""
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            bucket = AdaptiveTokenBucket(
+                rate_per_minute=float(os.getenv("LLM_RATE_LIMIT_RPM", "60")),
+                burst=int(os.getenv("LLM_RATE_LIMIT_BURST", "5")),
+            )
+            breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+            )
+            guard = _guards[name] = LLMGuard(name, bucket, breaker,
+                                             max_wait=float(os.getenv("LLM_RATE_LIMIT_WAIT", "30")))
+        return guard
+
+
+def guard_stats():
+    """Return {provider label: stats} for every guard created so far"""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.stats() for guard in guards}
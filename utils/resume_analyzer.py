@@ -1,5 +1,15 @@
 import re
+from .keyword_automaton import KeywordAutomaton
+from .text_extraction import extract_text
+
+
 class ResumeAnalyzer:
+    # Compiled keyword automata shared by all instances, keyed by their vocabulary
+    _automaton_cache = {}
+    _automaton_cache_size = 256
+    # Flattened role indexes, keyed by the id of the JOB_ROLES mapping they were built from
+    _role_index_cache = {}
+
     def __init__(self):
         # Document type indicators
         self.document_types = {
@@ -20,16 +30,98 @@ class ResumeAnalyzer:
                 'date of issue', 'identification'
             ]
         }
+
+        # Keywords that indicate each essential resume section
+        self.essential_sections = {
+            'contact': ['email', 'phone', 'address', 'linkedin'],
+            'education': ['education', 'university', 'college', 'degree', 'academic'],
+            'experience': ['experience', 'work', 'employment', 'job', 'internship'],
+            'skills': ['skills', 'technologies', 'tools', 'proficiencies', 'expertise']
+        }
+
+        # Section header keywords used by the resume extractors
+        self.section_keywords = {
+            'education': [
+                'education', 'academic', 'qualification', 'degree', 'university', 'college',
+                'school', 'institute', 'certification', 'diploma', 'bachelor', 'master',
+                'phd', 'b.tech', 'm.tech', 'b.e', 'm.e', 'b.sc', 'm.sc', 'bca', 'mca', 'b.com',
+                'm.com', 'b.cs-it', 'imca', 'bba', 'mba', 'honors', 'scholarship'
+            ],
+            'experience': [
+                'experience', 'employment', 'work history', 'professional experience',
+                'work experience', 'career history', 'professional background',
+                'employment history', 'job history', 'positions held',
+                'job title', 'job responsibilities', 'job description', 'job summary'
+            ],
+            'projects': [
+                'projects', 'personal projects', 'academic projects', 'key projects',
+                'major projects', 'professional projects', 'project experience',
+                'relevant projects', 'featured projects', 'latest projects',
+                'top projects'
+            ],
+            'skills': [
+                'skills', 'technical skills', 'competencies', 'expertise',
+                'core competencies', 'professional skills', 'key skills',
+                'technical expertise', 'proficiencies', 'qualifications',
+                'top skills', 'key skill', 'major skill', 'personal skill',
+                'soft skills', 'soft skill', 'soft skillset'
+            ],
+            'summary': [
+                'summary', 'professional summary', 'career summary', 'objective',
+                'career objective', 'professional objective', 'about me', 'profile',
+                'professional profile', 'career profile', 'overview', 'skill summary'
+            ]
+        }
+
+        # Compile each keyword list once so a line is classified in a single regex search
+        self._section_patterns = {
+            name: self._compile_keywords(keywords)
+            for name, keywords in self.section_keywords.items()
+        }
+        self._section_headers = {
+            name: frozenset(keywords) for name, keywords in self.section_keywords.items()
+        }
+        self._resume_keyword_pattern = self._compile_keywords(self.document_types['resume'])
+
+    @staticmethod
+    def _compile_keywords(keywords):
+        """Compile keywords into a single substring pattern (callers pass lowercased text)"""
+        return re.compile('|'.join(re.escape(keyword) for keyword in sorted(set(keywords))))
         
-    def detect_document_type(self, text):
-        text = text.lower()
+    def keyword_automaton(self, required_skills=()):
+        """Return the compiled automaton for the scoring dictionaries plus the given skills"""
+        vocabulary = frozenset(
+            keyword.lower()
+            for keywords in (
+                *self.document_types.values(),
+                *self.essential_sections.values(),
+                required_skills
+            )
+            for keyword in keywords
+        )
+        automaton = self._automaton_cache.get(vocabulary)
+        if automaton is None:
+            if len(self._automaton_cache) >= self._automaton_cache_size:
+                self._automaton_cache.clear()
+            automaton = KeywordAutomaton(sorted(vocabulary))
+            self._automaton_cache[vocabulary] = automaton
+        return automaton
+
+    def scan_keywords(self, text, required_skills=()):
+        """Scan text once and return {keyword: [positions]} for every scoring keyword"""
+        return self.keyword_automaton(required_skills).find_all(text)
+
+    def detect_document_type(self, text, hits=None):
+        if hits is None:
+            hits = self.scan_keywords(text)
         scores = {}
+        word_count = len(text.split())
         
         # Calculate score for each document type
         for doc_type, keywords in self.document_types.items():
-            matches = sum(1 for keyword in keywords if keyword in text)
+            matches = sum(1 for keyword in keywords if keyword in hits)
             density = matches / len(keywords)
-            frequency = matches / (len(text.split()) + 1)  # Add 1 to avoid division by zero
+            frequency = matches / (word_count + 1)  # Add 1 to avoid division by zero
             scores[doc_type] = (density * 0.7) + (frequency * 0.3)
         
         # Get the highest scoring document type
@@ -38,18 +130,15 @@ class ResumeAnalyzer:
         # Only return a document type if the score is significant
         return best_match[0] if best_match[1] > 0.15 else 'unknown'
         
-    def calculate_keyword_match(self, resume_text, required_skills):
-        resume_text = resume_text.lower()
+    def calculate_keyword_match(self, resume_text, required_skills, hits=None):
+        if hits is None:
+            hits = self.scan_keywords(resume_text, required_skills)
         found_skills = []
         missing_skills = []
         
+        # A substring hit anywhere also covers partial matches such as "Python" in "Python programming"
         for skill in required_skills:
-            skill_lower = skill.lower()
-            # Check for exact match
-            if skill_lower in resume_text:
-                found_skills.append(skill)
-            # Check for partial matches (e.g., "Python" in "Python programming")
-            elif any(skill_lower in phrase for phrase in resume_text.split('.')):
+            if skill.lower() in hits:
                 found_skills.append(skill)
             else:
                 missing_skills.append(skill)
@@ -62,18 +151,13 @@ class ResumeAnalyzer:
             'missing_skills': missing_skills
         }
         
-    def check_resume_sections(self, text):
-        text = text.lower()
-        essential_sections = {
-            'contact': ['email', 'phone', 'address', 'linkedin'],
-            'education': ['education', 'university', 'college', 'degree', 'academic'],
-            'experience': ['experience', 'work', 'employment', 'job', 'internship'],
-            'skills': ['skills', 'technologies', 'tools', 'proficiencies', 'expertise']
-        }
+    def check_resume_sections(self, text, hits=None):
+        if hits is None:
+            hits = self.scan_keywords(text)
         
         section_scores = {}
-        for section, keywords in essential_sections.items():
-            found = sum(1 for keyword in keywords if keyword in text)
+        for section, keywords in self.essential_sections.items():
+            found = sum(1 for keyword in keywords if keyword in hits)
             section_scores[section] = min(25, (found / len(keywords)) * 25)
             
         return sum(section_scores.values())
@@ -116,46 +200,20 @@ class ResumeAnalyzer:
             
         return max(0, score), deductions
         
+    @staticmethod
+    def extract_pdf(file):
+        """Extract text and page count from a PDF with a single parse"""
+        result = extract_text(file, 'pdf')
+        return result['text'], result['num_pages']
+
     @staticmethod
     def extract_text_from_pdf(file):
-        try:
-            import PyPDF2
-            import io
-            
-            # Create a PDF reader object
-            # First make sure we have the file content as bytes
-            if hasattr(file, 'read'):
-                # If it's already a file-like object, read it
-                file_content = file.read()
-                file.seek(0)  # Reset file pointer
-            else:
-                # If it's already bytes
-                file_content = file
-                
-            # Create BytesIO from bytes content
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            
-            # Extract text from all pages
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-                
-            return text
-        except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
+        return ResumeAnalyzer.extract_pdf(file)[0]
             
     @staticmethod
     def extract_text_from_docx(docx_file):
         """Extract text from a DOCX file"""
-        try:
-            from docx import Document
-            doc = Document(docx_file)
-            full_text = []
-            for paragraph in doc.paragraphs:
-                full_text.append(paragraph.text)
-            return '\n'.join(full_text)
-        except Exception as e:
-            raise Exception(f"Error extracting text from DOCX file: {str(e)}")
+        return extract_text(docx_file, 'docx')['text']
 
     def extract_personal_info(self, text):
         """Extract personal information from resume text"""
@@ -183,211 +241,93 @@ class ResumeAnalyzer:
             'portfolio': ''  # Can be enhanced later
         }
 
-    def extract_education(self, text):
-        """Extract education information from resume text"""
-        education = []
-        lines = text.split('\n')
-        education_keywords = [
-            'education', 'academic', 'qualification', 'degree', 'university', 'college',
-            'school', 'institute', 'certification', 'diploma', 'bachelor', 'master',
-            'phd', 'b.tech', 'm.tech', 'b.e', 'm.e', 'b.sc', 'm.sc','bca', 'mca', 'b.com',
-            'm.com', 'b.cs-it', 'imca', 'bba', 'mba', 'honors', 'scholarship'
-        ]
-        in_education_section = False
-        current_entry = []
+    def segment_sections(self, text):
+        """Split resume text into section entries in a single pass over its lines"""
+        sections = {name: [] for name in self.section_keywords}
+        in_section = {name: False for name in self.section_keywords}
+        current_entry = {name: [] for name in self.section_keywords}
+
+        def flush(name):
+            if current_entry[name]:
+                sections[name].append(' '.join(current_entry[name]))
+                current_entry[name] = []
 
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in education_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in education_keywords):
-                    # This line contains education info, not just a header
-                    current_entry.append(line)
-                in_education_section = True
-                continue
-            
-            if in_education_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(edu_key.lower() in line.lower() for edu_key in education_keywords):
-                        in_education_section = False
-                        if current_entry:
-                            education.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    education.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            education.append(' '.join(current_entry))
-        
-        return education
+            line_lower = line.lower()
+            # A resume keyword on a line that is not this section's header ends the section
+            ends_section = bool(line) and self._resume_keyword_pattern.search(line_lower) is not None
 
-    def extract_experience(self, text):
-        """Extract work experience information from resume text"""
-        experience = []
-        lines = text.split('\n')
-        experience_keywords = [
-            'experience', 'employment', 'work history', 'professional experience',
-            'work experience', 'career history', 'professional background',
-            'employment history', 'job history', 'positions held', 'experience',
-            'job title', 'job responsibilities', 'job description', 'job summary'
-        ]
-        in_experience_section = False
-        current_entry = []
+            for name, pattern in self._section_patterns.items():
+                # Check for section header
+                if pattern.search(line_lower):
+                    if line_lower not in self._section_headers[name]:
+                        # This line contains section info, not just a header
+                        current_entry[name].append(line)
+                    in_section[name] = True
+                    continue
+
+                if not in_section[name]:
+                    continue
 
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in experience_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in experience_keywords):
-                    # This line contains experience info, not just a header
-                    current_entry.append(line)
-                in_experience_section = True
-                continue
-            
-            if in_experience_section:
                 # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(exp_key.lower() in line.lower() for exp_key in experience_keywords):
-                        in_experience_section = False
-                        if current_entry:
-                            experience.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
+                if ends_section:
+                    in_section[name] = False
+                    flush(name)
+                    continue
+
                 if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    experience.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            experience.append(' '.join(current_entry))
-        
-        return experience
+                    current_entry[name].append(line)
+                else:  # Empty line closes the current entry
+                    flush(name)
 
-    def extract_projects(self, text):
-        """Extract project information from resume text"""
-        projects = []
-        lines = text.split('\n')
-        project_keywords = [
-            'projects', 'personal projects', 'academic projects', 'key projects',
-            'major projects', 'professional projects', 'project experience',
-            'relevant projects', 'featured projects','latest projects',
-            'top projects'
-        ]
-        in_project_section = False
-        current_entry = []
+        for name in sections:
+            flush(name)
 
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in project_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in project_keywords):
-                    # This line contains project info, not just a header
-                    current_entry.append(line)
-                in_project_section = True
-                continue
-            
-            if in_project_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(proj_key.lower() in line.lower() for proj_key in project_keywords):
-                        in_project_section = False
-                        if current_entry:
-                            projects.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    projects.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            projects.append(' '.join(current_entry))
-        
-        return projects
+        return sections
+
+    def extract_education(self, text, sections=None):
+        """Extract education information from resume text"""
+        if sections is None:
+            sections = self.segment_sections(text)
+        return list(sections['education'])
+
+    def extract_experience(self, text, sections=None):
+        """Extract work experience information from resume text"""
+        if sections is None:
+            sections = self.segment_sections(text)
+        return list(sections['experience'])
 
-    def extract_skills(self, text):
+    def extract_projects(self, text, sections=None):
+        """Extract project information from resume text"""
+        if sections is None:
+            sections = self.segment_sections(text)
+        return list(sections['projects'])
+
+    def extract_skills(self, text, sections=None):
         """Extract skills from resume text"""
+        if sections is None:
+            sections = self.segment_sections(text)
         skills = set()  # Use set to avoid duplicates
-        lines = text.split('\n')
-        skills_keywords = [
-            'skills', 'technical skills', 'competencies', 'expertise',
-            'core competencies', 'professional skills', 'key skills',
-            'technical expertise', 'proficiencies', 'qualifications',
-            'top skills', 'key skill', 'major skill', 'personal skill',
-            'soft skills', 'soft skill', 'soft skillset'
-        ]
-        in_skills_section = False
-        current_entry = []
 
         # Common skill separators
         separators = [',', '•', '|', '/', '\\', '·', '>', '-', '–', '―']
 
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in skills_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in skills_keywords):
-                    # This line contains skills, not just a header
-                    current_entry.append(line)
-                in_skills_section = True
-                continue
-            
-            if in_skills_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(skill_key.lower() in line.lower() for skill_key in skills_keywords):
-                        in_skills_section = False
-                        if current_entry:
-                            # Process the current entry
-                            text_to_process = ' '.join(current_entry)
-                            # Split by common separators
-                            for separator in separators:
-                                if separator in text_to_process:
-                                    skills.update(skill.strip() for skill in text_to_process.split(separator) if skill.strip())
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    # Process the current entry
-                    text_to_process = ' '.join(current_entry)
-                    # Split by common separators
-                    for separator in separators:
-                        if separator in text_to_process:
-                            skills.update(skill.strip() for skill in text_to_process.split(separator) if skill.strip())
-                    current_entry = []
-        
-        if current_entry:
-            # Process any remaining skills
-            text_to_process = ' '.join(current_entry)
+        for text_to_process in sections['skills']:
+            # Split by common separators
             for separator in separators:
                 if separator in text_to_process:
                     skills.update(skill.strip() for skill in text_to_process.split(separator) if skill.strip())
-        
+
         return list(skills)
 
-    def extract_summary(self, text):
+    def extract_summary(self, text, sections=None):
         """Extract summary/objective from resume text"""
+        if sections is None:
+            sections = self.segment_sections(text)
         summary = []
         lines = text.split('\n')
-        summary_keywords = [
-            'summary', 'professional summary', 'career summary', 'objective',
-            'career objective', 'professional objective', 'about me', 'profile',
-            'professional profile', 'career profile', 'overview', 'skill summary'
-        ]
-        in_summary_section = False
-        current_entry = []
+        summary_keywords = self.section_keywords['summary']
 
         # Try to find summary at the beginning of the resume
         start_index = 0
@@ -411,206 +351,280 @@ class ResumeAnalyzer:
                 if not re.search(r'\b(?:email|phone|address|tel|mobile|linkedin)\b', potential_summary.lower()):
                     summary.append(potential_summary)
 
-        # Look for explicitly marked summary section
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in summary_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in summary_keywords):
-                    # This line contains summary info, not just a header
-                    current_entry.append(line)
-                in_summary_section = True
-                continue
-            
-            if in_summary_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(sum_key.lower() in line.lower() for sum_key in summary_keywords):
-                        in_summary_section = False
-                        if current_entry:
-                            summary.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    summary.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            summary.append(' '.join(current_entry))
-        
+        # Explicitly marked summary section
+        summary.extend(sections['summary'])
+
         return ' '.join(summary) if summary else ''
 
+    def _non_resume_result(self, doc_type):
+        """Result returned when the document is not a resume"""
+        return {
+            'ats_score': 0,
+            'document_type': doc_type,
+            'keyword_match': {'score': 0, 'found_skills': [], 'missing_skills': []},
+            'section_score': 0,
+            'format_score': 0,
+            'suggestions': [f"This appears to be a {doc_type} document. Please upload a resume for ATS analysis."]
+        }
+
+    def _error_result(self, e):
+        """Default response when analysis fails"""
+        import traceback
+        print(f"Error analyzing resume: {str(e)}")
+        print(traceback.format_exc())
+        return {
+            'error': f"Resume analysis failed: {str(e)}",
+            'ats_score': 0,
+            'document_type': 'unknown',
+            'keyword_match': {'score': 0, 'found_skills': [], 'missing_skills': []},
+            'section_score': 0,
+            'format_score': 0,
+            'suggestions': [f"Error analyzing resume: {str(e)}. Please check your file and try again."]
+        }
+
+    def _profile_resume(self, text, hits):
+        """Run the role-independent part of the analysis (sections, formatting, contact info)"""
+        # Extract personal information
+        personal_info = self.extract_personal_info(text)
+
+        # Extract all resume sections from a single segmentation pass
+        sections = self.segment_sections(text)
+        education = self.extract_education(text, sections)
+        experience = self.extract_experience(text, sections)
+        projects = self.extract_projects(text, sections)
+        skills = self.extract_skills(text, sections)
+        summary = self.extract_summary(text, sections)
+
+        # Check resume sections
+        section_score = self.check_resume_sections(text, hits)
+
+        # Check formatting
+        format_score, format_deductions = self.check_formatting(text)
+
+        # Generate section-specific suggestions
+        contact_suggestions = []
+        if not personal_info.get('email'):
+            contact_suggestions.append("Add your email address")
+        if not personal_info.get('phone'):
+            contact_suggestions.append("Add your phone number")
+        if not personal_info.get('linkedin'):
+            contact_suggestions.append("Add your LinkedIn profile URL")
+
+        summary_suggestions = []
+        if not summary:
+            summary_suggestions.append("Add a professional summary to highlight your key qualifications")
+        elif len(summary.split()) < 30:
+            summary_suggestions.append("Expand your professional summary to better highlight your experience and goals")
+        elif len(summary.split()) > 100:
+            summary_suggestions.append("Consider making your summary more concise (aim for 50-75 words)")
+
+        experience_suggestions = []
+        if not experience:
+            experience_suggestions.append("Add your work experience section")
+        else:
+            has_dates = any(re.search(r'\b(19|20)\d{2}\b', exp) for exp in experience)
+            has_bullets = any(re.search(r'[•\-\*]', exp) for exp in experience)
+            has_action_verbs = any(re.search(r'\b(developed|managed|created|implemented|designed|led|improved)\b', 
+                                           exp.lower()) for exp in experience)
+
+            if not has_dates:
+                experience_suggestions.append("Include dates for each work experience")
+            if not has_bullets:
+                experience_suggestions.append("Use bullet points to list your achievements and responsibilities")
+            if not has_action_verbs:
+                experience_suggestions.append("Start bullet points with strong action verbs")
+
+        education_suggestions = []
+        has_gpa = False
+        if not education:
+            education_suggestions.append("Add your educational background")
+        else:
+            has_dates = any(re.search(r'\b(19|20)\d{2}\b', edu) for edu in education)
+            has_degree = any(re.search(r'\b(bachelor|master|phd|b\.|m\.|diploma)\b', 
+                                     edu.lower()) for edu in education)
+            has_gpa = any(re.search(r'\b(gpa|cgpa|grade|percentage)\b', 
+                                  edu.lower()) for edu in education)
+
+            if not has_dates:
+                education_suggestions.append("Include graduation dates")
+            if not has_degree:
+                education_suggestions.append("Specify your degree type")
+
+        format_suggestions = []
+        if format_score < 100:
+            format_suggestions.extend(format_deductions)
+
+        return {
+            'personal_info': personal_info,
+            'education': education,
+            'experience': experience,
+            'projects': projects,
+            'skills': skills,
+            'summary': summary,
+            'section_score': section_score,
+            'format_score': format_score,
+            'has_gpa': has_gpa,
+            'contact_suggestions': contact_suggestions,
+            'summary_suggestions': summary_suggestions,
+            'experience_suggestions': experience_suggestions,
+            'education_suggestions': education_suggestions,
+            'format_suggestions': format_suggestions
+        }
+
+    def _score_for_role(self, profile, job_requirements, keyword_match):
+        """Combine a role-independent profile with one role's keyword match into the final result"""
+        skills = profile['skills']
+
+        skills_suggestions = []
+        if not skills:
+            skills_suggestions.append("Add a dedicated skills section")
+        if isinstance(skills, (list, set)) and len(list(skills)) < 5:
+            skills_suggestions.append("List more relevant technical and soft skills")
+        if keyword_match['score'] < 70:
+            skills_suggestions.append("Add more skills that match the job requirements")
+
+        education_suggestions = list(profile['education_suggestions'])
+        if profile['education'] and not profile['has_gpa'] and job_requirements.get('require_gpa', False):
+            education_suggestions.append("Include your GPA if it's above 3.0")
+
+        contact_suggestions = profile['contact_suggestions']
+        summary_suggestions = profile['summary_suggestions']
+        experience_suggestions = profile['experience_suggestions']
+        format_suggestions = profile['format_suggestions']
+        format_score = profile['format_score']
+
+        # Calculate section-specific scores
+        contact_score = 100 - (len(contact_suggestions) * 25)  # -25 for each missing item
+        summary_score = 100 - (len(summary_suggestions) * 33)  # -33 for each issue
+        skills_score = keyword_match['score']
+        experience_score = 100 - (len(experience_suggestions) * 25)
+        education_score = 100 - (len(education_suggestions) * 25)
+
+        # Calculate overall ATS score with weighted components
+        ats_score = (
+            int(round(contact_score * 0.1)) +      # 10% weight for contact info
+            int(round(summary_score * 0.1)) +      # 10% weight for summary
+            int(round(skills_score * 0.3)) +       # 30% weight for skills match
+            int(round(experience_score * 0.2)) +   # 20% weight for experience
+            int(round(education_score * 0.1)) +    # 10% weight for education
+            int(round(format_score * 0.2))         # 20% weight for formatting
+        )
+
+        # Combine all suggestions into a single list
+        suggestions = []
+        suggestions.extend(contact_suggestions)
+        suggestions.extend(summary_suggestions)
+        suggestions.extend(skills_suggestions)
+        suggestions.extend(experience_suggestions)
+        suggestions.extend(education_suggestions)
+        suggestions.extend(format_suggestions)
+
+        if not suggestions:
+            suggestions.append("Your resume is well-optimized for ATS systems")
+
+        # Return final structured result
+        return {
+            **profile['personal_info'],  # Include extracted personal info
+            'ats_score': ats_score,
+            'document_type': 'resume',
+            'keyword_match': keyword_match,
+            'section_score': profile['section_score'],
+            'format_score': format_score,
+            'education': profile['education'],
+            'experience': profile['experience'],
+            'projects': profile['projects'],
+            'skills': skills,
+            'summary': profile['summary'],
+            'suggestions': suggestions,
+            'contact_suggestions': contact_suggestions,
+            'summary_suggestions': summary_suggestions,
+            'skills_suggestions': skills_suggestions,
+            'experience_suggestions': experience_suggestions,
+            'education_suggestions': education_suggestions,
+            'format_suggestions': format_suggestions,
+            'section_scores': {
+                'contact': contact_score,
+                'summary': summary_score,
+                'skills': skills_score,
+                'experience': experience_score,
+                'education': education_score,
+                'format': format_score
+            }
+        }
+
     def analyze_resume(self, resume_data, job_requirements):
         """Analyze resume and return scores and recommendations"""
         try:
             text = resume_data.get('raw_text', '')
-            
-            # Extract personal information
-            personal_info = self.extract_personal_info(text)
-            
+
+            # Scan once for every document type, section and required skill keyword
+            required_skills = job_requirements.get('required_skills', [])
+            hits = self.scan_keywords(text, required_skills)
+
             # First detect document type
-            doc_type = self.detect_document_type(text)
+            doc_type = self.detect_document_type(text, hits)
             if doc_type != 'resume':
-                return {
-                    'ats_score': 0,
-                    'document_type': doc_type,
-                    'keyword_match': {'score': 0, 'found_skills': [], 'missing_skills': []},
-                    'section_score': 0,
-                    'format_score': 0,
-                    'suggestions': [f"This appears to be a {doc_type} document. Please upload a resume for ATS analysis."]
-                }
-                
+                return self._non_resume_result(doc_type)
+
             # Calculate keyword match
-            required_skills = job_requirements.get('required_skills', [])
-            keyword_match = self.calculate_keyword_match(text, required_skills)
-            
-            # Extract all resume sections
-            education = self.extract_education(text)
-            experience = self.extract_experience(text)
-            projects = self.extract_projects(text)
-            skills = list(self.extract_skills(text))  # Convert skills set to list
-            summary = self.extract_summary(text)
-            
-            # Check resume sections
-            section_score = self.check_resume_sections(text)
-            
-            # Check formatting
-            format_score, format_deductions = self.check_formatting(text)
-            
-            # Generate section-specific suggestions
-            contact_suggestions = []
-            if not personal_info.get('email'):
-                contact_suggestions.append("Add your email address")
-            if not personal_info.get('phone'):
-                contact_suggestions.append("Add your phone number")
-            if not personal_info.get('linkedin'):
-                contact_suggestions.append("Add your LinkedIn profile URL")
-            
-            summary_suggestions = []
-            if not summary:
-                summary_suggestions.append("Add a professional summary to highlight your key qualifications")
-            elif len(summary.split()) < 30:
-                summary_suggestions.append("Expand your professional summary to better highlight your experience and goals")
-            elif len(summary.split()) > 100:
-                summary_suggestions.append("Consider making your summary more concise (aim for 50-75 words)")
-            
-            skills_suggestions = []
-            if not skills:
-                skills_suggestions.append("Add a dedicated skills section")
-            if isinstance(skills, (list, set)) and len(list(skills)) < 5:
-                skills_suggestions.append("List more relevant technical and soft skills")
-            if keyword_match['score'] < 70:
-                skills_suggestions.append("Add more skills that match the job requirements")
-            
-            experience_suggestions = []
-            if not experience:
-                experience_suggestions.append("Add your work experience section")
-            else:
-                has_dates = any(re.search(r'\b(19|20)\d{2}\b', exp) for exp in experience)
-                has_bullets = any(re.search(r'[•\-\*]', exp) for exp in experience)
-                has_action_verbs = any(re.search(r'\b(developed|managed|created|implemented|designed|led|improved)\b', 
-                                               exp.lower()) for exp in experience)
-                
-                if not has_dates:
-                    experience_suggestions.append("Include dates for each work experience")
-                if not has_bullets:
-                    experience_suggestions.append("Use bullet points to list your achievements and responsibilities")
-                if not has_action_verbs:
-                    experience_suggestions.append("Start bullet points with strong action verbs")
-            
-            education_suggestions = []
-            if not education:
-                education_suggestions.append("Add your educational background")
-            else:
-                has_dates = any(re.search(r'\b(19|20)\d{2}\b', edu) for edu in education)
-                has_degree = any(re.search(r'\b(bachelor|master|phd|b\.|m\.|diploma)\b', 
-                                         edu.lower()) for edu in education)
-                has_gpa = any(re.search(r'\b(gpa|cgpa|grade|percentage)\b', 
-                                      edu.lower()) for edu in education)
-                
-                if not has_dates:
-                    education_suggestions.append("Include graduation dates")
-                if not has_degree:
-                    education_suggestions.append("Specify your degree type")
-                if not has_gpa and job_requirements.get('require_gpa', False):
-                    education_suggestions.append("Include your GPA if it's above 3.0")
-            
-            format_suggestions = []
-            if format_score < 100:
-                format_suggestions.extend(format_deductions)
-            
-            # Calculate section-specific scores
-            contact_score = 100 - (len(contact_suggestions) * 25)  # -25 for each missing item
-            summary_score = 100 - (len(summary_suggestions) * 33)  # -33 for each issue
-            skills_score = keyword_match['score']
-            experience_score = 100 - (len(experience_suggestions) * 25)
-            education_score = 100 - (len(education_suggestions) * 25)
-            
-            # Calculate overall ATS score with weighted components
-            ats_score = (
-                int(round(contact_score * 0.1)) +      # 10% weight for contact info
-                int(round(summary_score * 0.1)) +      # 10% weight for summary
-                int(round(skills_score * 0.3)) +       # 30% weight for skills match
-                int(round(experience_score * 0.2)) +   # 20% weight for experience
-                int(round(education_score * 0.1)) +    # 10% weight for education
-                int(round(format_score * 0.2))         # 20% weight for formatting
-            )
-            
-            # Combine all suggestions into a single list
-            suggestions = []
-            suggestions.extend(contact_suggestions)
-            suggestions.extend(summary_suggestions)
-            suggestions.extend(skills_suggestions)
-            suggestions.extend(experience_suggestions)
-            suggestions.extend(education_suggestions)
-            suggestions.extend(format_suggestions)
-            
-            if not suggestions:
-                suggestions.append("Your resume is well-optimized for ATS systems")
-            
-            # Return final structured result
-            return {
-                **personal_info,  # Include extracted personal info
-                'ats_score': ats_score,
-                'document_type': 'resume',
-                'keyword_match': keyword_match,
-                'section_score': section_score,
-                'format_score': format_score,
-                'education': education,
-                'experience': experience,
-                'projects': projects,
-                'skills': skills,
-                'summary': summary,
-                'suggestions': suggestions,
-                'contact_suggestions': contact_suggestions,
-                'summary_suggestions': summary_suggestions,
-                'skills_suggestions': skills_suggestions,
-                'experience_suggestions': experience_suggestions,
-                'education_suggestions': education_suggestions,
-                'format_suggestions': format_suggestions,
-                'section_scores': {
-                    'contact': contact_score,
-                    'summary': summary_score,
-                    'skills': skills_score,
-                    'experience': experience_score,
-                    'education': education_score,
-                    'format': format_score
-                }
-            }
+            keyword_match = self.calculate_keyword_match(text, required_skills, hits)
+
+            profile = self._profile_resume(text, hits)
+            return self._score_for_role(profile, job_requirements, keyword_match)
+        except Exception as e:
+            return self._error_result(e)
+
+    def build_role_index(self, job_roles):
+        """Flatten a JOB_ROLES mapping into (category, role, info) entries plus the union of their skills"""
+        cached = self._role_index_cache.get(id(job_roles))
+        if cached is not None and cached[0] is job_roles:
+            return cached[1]
+
+        roles = []
+        skills = set()
+        for category, category_roles in job_roles.items():
+            for role_name, role_info in category_roles.items():
+                roles.append((category, role_name, role_info))
+                skills.update(role_info.get('required_skills', []))
+        index = {'roles': roles, 'skills': sorted(skills)}
+        self._role_index_cache[id(job_roles)] = (job_roles, index)
+        return index
+
+    def rank_roles(self, resume_data, job_roles):
+        """Score a resume against every role in job_roles with a single keyword scan.
+
+        Returns a dict with the document type and 'rankings', a list of
+        {'category', 'role', 'ats_score', 'keyword_match_score', 'analysis'}
+        sorted best match first. 'analysis' is the same result analyze_resume
+        would return for that role.
+        """
+        try:
+            text = resume_data.get('raw_text', '')
+            index = self.build_role_index(job_roles)
+
+            # One scan covers the scoring dictionaries and every role's skills
+            hits = self.scan_keywords(text, index['skills'])
+
+            doc_type = self.detect_document_type(text, hits)
+            if doc_type != 'resume':
+                return {'document_type': doc_type, 'rankings': [], 'analysis': self._non_resume_result(doc_type)}
+
+            # Role-independent analysis runs once and is reused for every role
+            profile = self._profile_resume(text, hits)
+
+            rankings = []
+            for category, role_name, role_info in index['roles']:
+                keyword_match = self.calculate_keyword_match(text, role_info.get('required_skills', []), hits)
+                analysis = self._score_for_role(profile, role_info, keyword_match)
+                rankings.append({
+                    'category': category,
+                    'role': role_name,
+                    'ats_score': analysis['ats_score'],
+                    'keyword_match_score': keyword_match['score'],
+                    'analysis': analysis
+                })
+
+            rankings.sort(key=lambda r: (r['ats_score'], r['keyword_match_score']), reverse=True)
+            return {'document_type': 'resume', 'rankings': rankings}
         except Exception as e:
-            import traceback
-            print(f"Error analyzing resume: {str(e)}")
-            print(traceback.format_exc())
-            # Return a default error response
-            return {
-                'error': f"Resume analysis failed: {str(e)}",
-                'ats_score': 0,
-                'document_type': 'unknown',
-                'keyword_match': {'score': 0, 'found_skills': [], 'missing_skills': []},
-                'section_score': 0,
-                'format_score': 0,
-                'suggestions': [f"Error analyzing resume: {str(e)}. Please check your file and try again."]
-            }
\ No newline at end of file
+            return {'document_type': 'unknown', 'rankings': [], 'analysis': self._error_result(e)}
@@ -1,7 +1,4 @@
-import pypdf
-import docx
-import re
-from io import BytesIO
+from .text_extraction import extract_text
 
 class ResumeParser:
     def __init__(self):
@@ -9,36 +6,14 @@ class ResumeParser:
         
     def extract_text_from_pdf(self, pdf_file):
         try:
-            # Handle different file input types
-            if hasattr(pdf_file, 'read'):
-                # If it's a file-like object
-                file_content = pdf_file.read()
-                pdf_file.seek(0)  # Reset file pointer
-            else:
-                # If it's already bytes
-                file_content = pdf_file
-                
-            pdf_reader = pypdf.PdfReader(BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-                else:
-                    # Handle empty page text
-                    text += "\n"
-            return text.strip()
+            return extract_text(pdf_file, 'pdf')['text']
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
             return ""
             
     def extract_text_from_docx(self, docx_file):
         try:
-            doc = docx.Document(BytesIO(docx_file.read()))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            return extract_text(docx_file, 'docx')['text']
         except Exception as e:
             print(f"Error extracting text from DOCX: {e}")
             return ""
@@ -0,0 +1,92 @@
+"""
+Single-flight coalescing of identical in-flight calls
+
+When the same resume and role are analyzed from several tabs, or a Streamlit
+rerun resubmits an analysis that is still running, every request would send
+an identical prompt. SingleFlight lets the first caller for a key run the
+call while concurrent callers with the same key wait for, and share, its
+result. It works across sessions because it lives at process level.
+"""
+import threading
+
+
+class Cancelled(RuntimeError):
+    """Raised when a caller's cancel_event stops its call or its wait"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, cancel_event=None):
+        """Run fn() once per key at a time and return its result to every concurrent caller.
+
+        Exceptions raised by fn() are re-raised in every caller, except
+        Cancelled: when the leading caller is cancelled, waiting callers run
+        the call again instead of inheriting someone else's cancellation. A
+        waiting caller whose cancel_event is set stops waiting (the shared call
+        keeps running for the others).
+        """
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                try:
+                    call.result = fn()
+                except BaseException as e:
+                    call.error = e
+                finally:
+                    with self._lock:
+                        del self._calls[key]
+                    call.done.set()
+            else:
+                while not call.done.wait(0.25):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise Cancelled("AI analysis was cancelled")
+                if isinstance(call.error, Cancelled):
+                    continue
+
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def _join(self, key):
+        """Return (call, is_leader) for key, registering a new call when none is running"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            return call, leader
+
+    def in_flight(self):
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """Return executed and coalesced call counts"""
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+
+_llm_flight = SingleFlight()
+
+
+def get_llm_single_flight():
+    """Return the process-wide single-flight group for LLM calls"""
+    return _llm_flight
@@ -0,0 +1,439 @@
+"""
+Unified text extraction for PDF and DOCX resumes
+
+Every analyzer goes through extract_text(), which tries the registered backends
+for the file type fastest-first and falls back to the next one when a backend
+is missing, fails, or returns no text. Large PDFs are split into page ranges
+that are extracted in parallel worker processes and reassembled in page order,
+and scanned pages without a text layer are sent to the OCR fallback. Headers
+and footers repeated at the top or bottom of several pages are kept only where
+they first appear. Run as a script to benchmark backends:
+
+    python -m utils.text_extraction benchmark samples/
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from . import ocr_fallback
+
+# Documents with at least this many pages are extracted page-parallel
+PARALLEL_MIN_PAGES = int(os.getenv("EXTRACTION_PARALLEL_MIN_PAGES", "8"))
+PARALLEL_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+# Non-blank lines at the top and at the bottom of each page checked for repeated headers/footers
+FURNITURE_LINES = 3
+
+
+class ExtractionError(Exception):
+    """Raised when no backend could extract a document"""
+
+
+class ExtractionBackend:
+    """Base class for a text extraction backend.
+
+    Subclasses set ``name``, ``module`` (the import that must succeed for the
+    backend to be usable) and ``file_type``, and implement extract_pages().
+    Backends that can read individual pages set ``supports_pages`` and
+    implement count_pages() so large documents can be sharded across workers.
+    """
+    name = ''
+    module = ''
+    file_type = 'pdf'
+    supports_pages = False
+
+    def __init__(self):
+        self._available = None
+
+    def is_available(self):
+        """Return True when the backend's library can be imported"""
+        if self._available is None:
+            try:
+                importlib.import_module(self.module)
+                self._available = True
+            except ImportError:
+                self._available = False
+        return self._available
+
+    def extract_pages(self, stream, page_numbers=None, max_pages=None):
+        """Return (page_texts, num_pages), reading only page_numbers (0-based) or the first max_pages when given"""
+        raise NotImplementedError
+
+    def count_pages(self, stream):
+        """Return the number of pages without extracting any text"""
+        raise NotImplementedError
+
+
+class PypdfBackend(ExtractionBackend):
+    name = 'pypdf'
+    module = 'pypdf'
+    supports_pages = True
+
+    def _reader(self, stream):
+        import pypdf
+        return pypdf.PdfReader(stream)
+
+    def extract_pages(self, stream, page_numbers=None, max_pages=None):
+        reader = self._reader(stream)
+        num_pages = len(reader.pages)
+        if page_numbers is None:
+            page_numbers = range(num_pages if max_pages is None else min(num_pages, max_pages))
+        return [reader.pages[number].extract_text() or '' for number in page_numbers], num_pages
+
+    def count_pages(self, stream):
+        return len(self._reader(stream).pages)
+
+
+class PyPDF2Backend(PypdfBackend):
+    name = 'pypdf2'
+    module = 'PyPDF2'
+
+    def _reader(self, stream):
+        import PyPDF2
+        return PyPDF2.PdfReader(stream)
+
+
+class PdfplumberBackend(ExtractionBackend):
+    """Slower, but keeps reading order and column layout closer to the page"""
+    name = 'pdfplumber'
+    module = 'pdfplumber'
+    supports_pages = True
+
+    def extract_pages(self, stream, page_numbers=None, max_pages=None):
+        import pdfplumber
+        with pdfplumber.open(stream) as pdf:
+            num_pages = len(pdf.pages)
+            if page_numbers is None:
+                page_numbers = range(num_pages if max_pages is None else min(num_pages, max_pages))
+            return [pdf.pages[number].extract_text() or '' for number in page_numbers], num_pages
+
+    def count_pages(self, stream):
+        import pdfplumber
+        with pdfplumber.open(stream) as pdf:
+            return len(pdf.pages)
+
+
+class DocxBackend(ExtractionBackend):
+    name = 'python-docx'
+    module = 'docx'
+    file_type = 'docx'
+
+    def extract_pages(self, stream, page_numbers=None, max_pages=None):
+        from docx import Document
+        doc = Document(stream)
+        # DOCX has no fixed pages; section breaks are the closest approximation
+        num_pages = len(doc.element.xpath('//w:sectPr')) or 1
+        return ['\n'.join(paragraph.text for paragraph in doc.paragraphs)], num_pages
+
+
+BACKENDS = {}
+
+# Fallback chains, fastest first
+DEFAULT_CHAINS = {
+    'pdf': ['pypdf', 'pypdf2', 'pdfplumber'],
+    'docx': ['python-docx'],
+}
+LAYOUT_CHAINS = {
+    'pdf': ['pdfplumber', 'pypdf', 'pypdf2'],
+    'docx': ['python-docx'],
+}
+
+
+def register_backend(backend, position=None):
+    """Register a backend and add it to its file type's fallback chains"""
+    BACKENDS[backend.name] = backend
+    chain = DEFAULT_CHAINS.setdefault(backend.file_type, [])
+    if backend.name not in chain:
+        chain.insert(len(chain) if position is None else position, backend.name)
+    layout_chain = LAYOUT_CHAINS.setdefault(backend.file_type, [])
+    if backend.name not in layout_chain:
+        layout_chain.append(backend.name)
+
+
+for _backend in (PypdfBackend(), PyPDF2Backend(), PdfplumberBackend(), DocxBackend()):
+    register_backend(_backend)
+
+
+def detect_file_type(file):
+    """Guess 'pdf' or 'docx' from a file name or the leading magic bytes"""
+    name = file if isinstance(file, str) else getattr(file, 'name', '') or ''
+    lowered = name.lower()
+    if lowered.endswith('.pdf'):
+        return 'pdf'
+    if lowered.endswith('.docx'):
+        return 'docx'
+    if isinstance(file, str):
+        return None
+    header = bytes(file[:4]) if isinstance(file, (bytes, bytearray, memoryview)) else _peek(file, 4)
+    if header.startswith(b'%PDF'):
+        return 'pdf'
+    if header.startswith(b'PK'):
+        return 'docx'
+    return None
+
+
+def _peek(stream, size):
+    position = stream.tell()
+    header = stream.read(size)
+    stream.seek(position)
+    return header
+
+
+def _open_stream(file):
+    """Return a seekable binary stream for a path, raw bytes or file-like upload"""
+    if isinstance(file, str):
+        return open(file, 'rb')
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return io.BytesIO(file)
+    file.seek(0)
+    return file
+
+
+def strip_page_furniture(pages):
+    """Drop headers/footers repeated at the edges of several pages, keeping their first occurrence.
+
+    A line counts as a header or footer only when it sits at the same place
+    (the same line among the first or last FURNITURE_LINES non-blank lines)
+    on several pages, so lines that repeat in the body (the same job title
+    at several employers, "Present", a location) are never touched.
+    """
+    if len(pages) < 2:
+        return pages
+    edges = []
+    for page in pages:
+        numbered = [(index, ' '.join(line.split())) for index, line in enumerate(page.split('\n')) if line.strip()]
+        top = [(('top', offset, line), index) for offset, (index, line) in enumerate(numbered[:FURNITURE_LINES])]
+        bottom = [(('bottom', offset, line), index)
+                  for offset, (index, line) in enumerate(reversed(numbered[FURNITURE_LINES:][-FURNITURE_LINES:]))]
+        edges.append([(key, index) for key, index in top + bottom if len(key[2]) <= 80])
+    counts = {}
+    for page_edges in edges:
+        for key in {key for key, _ in page_edges}:
+            counts[key] = counts.get(key, 0) + 1
+    min_pages = max(2, len(pages) // 2)
+    furniture = {key for key, count in counts.items() if count >= min_pages}
+    if not furniture:
+        return pages
+
+    stripped, seen = [], set()
+    for page, page_edges in zip(pages, edges):
+        drop = {index for key, index in page_edges if key in furniture and key in seen}
+        seen.update(key for key, _ in page_edges if key in furniture)
+        stripped.append('\n'.join(line for index, line in enumerate(page.split('\n')) if index not in drop))
+    return stripped
+
+
+def normalize_text(pages):
+    """Join page texts with consistent line endings and no trailing whitespace"""
+    lines = []
+    for page in pages:
+        page = page.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+        lines.extend(line.rstrip() for line in page.split('\n'))
+    return '\n'.join(lines).strip()
+
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool():
+    """Return the process pool shared by all page-parallel extractions"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS)
+        return _page_pool
+
+
+def _extract_page_range(backend_name, content, page_numbers):
+    """Worker entry point: extract a contiguous range of pages from the document bytes"""
+    return BACKENDS[backend_name].extract_pages(io.BytesIO(content), page_numbers)[0]
+
+
+def _extract_parallel(backend, content, page_numbers, workers):
+    """Shard page_numbers across the pool and return page texts in page order"""
+    shard_size = -(-len(page_numbers) // workers)
+    shards = [page_numbers[i:i + shard_size] for i in range(0, len(page_numbers), shard_size)]
+    pool = _get_page_pool()
+    futures = [pool.submit(_extract_page_range, backend.name, content, shard) for shard in shards]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def _run_backend(backend, stream, max_pages, parallel):
+    """Extract with one backend, honouring the page cap and page-parallel mode.
+
+    The document is only counted up front when it could be sharded (parallel
+    forced on, or auto mode with a page cap of at least PARALLEL_MIN_PAGES);
+    otherwise a single pass reads the pages and the page count together.
+    Returns (page_texts, num_pages, truncated).
+    """
+    if not backend.supports_pages:
+        pages, num_pages = backend.extract_pages(stream)
+        return pages, num_pages, False
+
+    may_shard = PARALLEL_WORKERS > 1 and (
+        parallel is True or (parallel is None and (max_pages is None or max_pages >= PARALLEL_MIN_PAGES))
+    )
+    if may_shard:
+        num_pages = backend.count_pages(stream)
+        page_numbers = list(range(num_pages if max_pages is None else min(num_pages, max_pages)))
+        workers = min(PARALLEL_WORKERS, len(page_numbers))
+        use_parallel = parallel if parallel is not None else len(page_numbers) >= PARALLEL_MIN_PAGES
+        stream.seek(0)
+        if use_parallel and workers > 1:
+            return (_extract_parallel(backend, stream.read(), page_numbers, workers), num_pages,
+                    len(page_numbers) < num_pages)
+    pages, num_pages = backend.extract_pages(stream, max_pages=max_pages)
+    return pages, num_pages, len(pages) < num_pages
+
+
+def _ocr_blank_pages(stream, pages, inline):
+    """Fill pages without a text layer from the OCR fallback; returns (pages filled, pages still blank)"""
+    blank = [number for number, page in enumerate(pages) if not page.strip()]
+    if not blank:
+        return 0, 0
+    stream.seek(0)
+    texts = ocr_fallback.ocr_pages(stream.read(), blank, inline=inline)
+    for number, text in texts.items():
+        pages[number] = text
+    return len(texts), len(blank) - len(texts)
+
+
+def extract_text(file, file_type=None, layout=False, backends=None, max_pages=None, parallel=None, ocr=None):
+    """Extract text from a PDF or DOCX resume.
+
+    Parameters:
+    - file: a path, raw bytes, or a file-like object such as a Streamlit upload
+    - file_type: 'pdf' or 'docx'; detected from the name or content when omitted
+    - layout: prefer the layout-preserving backend for PDFs
+    - backends: explicit list of backend names to try, in order
+    - max_pages: only extract the first max_pages pages (num_pages still reports the full count)
+    - parallel: force page-parallel extraction and OCR on (True) or off (False);
+      by default pages are extracted in parallel for documents with at least
+      PARALLEL_MIN_PAGES pages and OCR always uses the worker pool
+    - ocr: OCR PDF pages that have no text layer; defaults to on when Tesseract is installed
+    Returns:
+    - Dictionary with 'text', 'num_pages', 'truncated', 'ocr_pages', the
+      'backend' that produced the text and 'ocr_incomplete' (True when OCR
+      ran but some blank pages timed out, failed or came back empty)
+    """
+    file_type = file_type or detect_file_type(file)
+    if file_type not in DEFAULT_CHAINS:
+        raise ExtractionError(f"Unsupported file type: {file_type}")
+    chain = backends or (LAYOUT_CHAINS if layout else DEFAULT_CHAINS)[file_type]
+    use_ocr = file_type == 'pdf' and (ocr_fallback.is_enabled() if ocr is None else ocr)
+
+    stream = _open_stream(file)
+    errors = []
+    chosen = None
+    try:
+        for name in chain:
+            backend = BACKENDS.get(name)
+            if backend is None or not backend.is_available():
+                continue
+            try:
+                stream.seek(0)
+                pages, num_pages, truncated = _run_backend(backend, stream, max_pages, parallel)
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                continue
+            has_text = any(page.strip() for page in pages)
+            if has_text or chosen is None:
+                chosen = (name, pages, num_pages, truncated)
+            if has_text:
+                break
+            # No text layer according to this backend; a slower one may still find some
+
+        if chosen is None:
+            if not errors:
+                raise ExtractionError(f"No {file_type} extraction backend is installed (tried {', '.join(chain)})")
+            raise ExtractionError(f"Error extracting text from {file_type.upper()}: {'; '.join(errors)}")
+
+        name, pages, num_pages, truncated = chosen
+        ocr_count, ocr_missing = _ocr_blank_pages(stream, pages, inline=parallel is False) if use_ocr else (0, 0)
+    finally:
+        if isinstance(file, str):
+            stream.close()
+
+    return {
+        'text': normalize_text(strip_page_furniture(pages)),
+        'num_pages': num_pages,
+        'truncated': truncated,
+        'ocr_pages': ocr_count,
+        'ocr_incomplete': ocr_missing > 0,
+        'backend': name
+    }
+
+
+def benchmark(paths, backend_names=None, repeat=1):
+    """Time every available backend on a sample corpus.
+
+    Returns {backend: {'files', 'pages', 'failures', 'seconds', 'pages_per_sec'}}.
+    """
+    results = {}
+    names = backend_names or list(BACKENDS)
+    for name in names:
+        backend = BACKENDS.get(name)
+        if backend is None or not backend.is_available():
+            continue
+        stats = {'files': 0, 'pages': 0, 'failures': 0, 'seconds': 0.0}
+        for path in paths:
+            if detect_file_type(path) != backend.file_type:
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            stats['files'] += 1
+            for _ in range(repeat):
+                started = time.perf_counter()
+                try:
+                    _, num_pages = backend.extract_pages(io.BytesIO(content))
+                except Exception:
+                    stats['failures'] += 1
+                    continue
+                stats['seconds'] += time.perf_counter() - started
+                stats['pages'] += num_pages
+        stats['pages_per_sec'] = stats['pages'] / stats['seconds'] if stats['seconds'] else 0.0
+        results[name] = stats
+    return results
+
+
+def _collect_samples(inputs):
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                paths.extend(os.path.join(root, name) for name in names if detect_file_type(name))
+        else:
+            paths.append(path)
+    return sorted(paths)
+
+
+def main():
+    """Command line entry point: benchmark backends on a sample corpus"""
+    parser = argparse.ArgumentParser(description="Resume text extraction tools.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench = subparsers.add_parser('benchmark', help="Report pages/sec for each extraction backend")
+    bench.add_argument('inputs', nargs='+', help="Sample PDF/DOCX files or directories")
+    bench.add_argument('--backend', action='append', dest='backends', help="Only benchmark these backends")
+    bench.add_argument('--repeat', type=int, default=1, help="Extract each file this many times")
+    args = parser.parse_args()
+
+    paths = _collect_samples(args.inputs)
+    if not paths:
+        sys.exit("No PDF or DOCX samples found.")
+    results = benchmark(paths, args.backends, args.repeat)
+    print(f"{'backend':<14}{'files':>8}{'pages':>8}{'fails':>8}{'seconds':>10}{'pages/sec':>12}")
+    for name, stats in sorted(results.items(), key=lambda item: -item[1]['pages_per_sec']):
+        print(f"{name:<14}{stats['files']:>8}{stats['pages']:>8}{stats['failures']:>8}"
+              f"{stats['seconds']:>10.2f}{stats['pages_per_sec']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
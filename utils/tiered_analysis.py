@@ -0,0 +1,57 @@
+"""
+Tiered resume analysis
+
+The keyword-based ResumeAnalyzer answers in milliseconds while the AI
+analysis takes seconds. The AI tab shows the keyword tier straight away and
+merges the AI result in when it arrives. merge_tiers() records which tier
+produced each part in ``provenance`` so the page can label it.
+"""
+import time
+
+KEYWORD_SOURCE = "Keyword analysis"
+
+# AI result keys rendered on the page
+AI_DISPLAY_KEYS = (
+    'overall_assessment', 'professional_profile', 'skills_analysis', 'experience_analysis',
+    'education_analysis', 'strengths', 'weaknesses', 'ats_optimization', 'suggestions', 'resume_score',
+    'ats_score', 'current_skills', 'missing_skills', 'role_alignment', 'job_match', 'missing_requirements',
+    'full_response',
+)
+# AI key -> path in the keyword result that stands in when the AI left it empty
+KEYWORD_STAND_INS = {
+    'ats_score': ('ats_score',),
+    'current_skills': ('keyword_match', 'found_skills'),
+    'missing_skills': ('keyword_match', 'missing_skills'),
+}
+
+
+def keyword_tier(analyzer, text, role_info):
+    """Run the instant keyword analysis and return its result with elapsed_ms"""
+    started = time.perf_counter()
+    result = analyzer.analyze_resume({'raw_text': text}, role_info or {})
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def merge_tiers(keyword, ai):
+    """Return the AI result enriched with the keyword tier, plus provenance {key: source}"""
+    ai_source = KEYWORD_SOURCE if ai.get('fallback') else ai.get('model_used') or "AI"
+    merged = dict(ai)
+    provenance = {key: ai_source for key in AI_DISPLAY_KEYS if ai.get(key)}
+    if 'error' not in keyword:
+        for key, path in KEYWORD_STAND_INS.items():
+            if merged.get(key):
+                continue
+            value = keyword
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+            if value:
+                merged[key] = value
+                provenance[key] = KEYWORD_SOURCE
+        merged['keyword_ats_score'] = keyword.get('ats_score', 0)
+        merged['keyword_match'] = keyword.get('keyword_match', {})
+        merged['keyword_suggestions'] = keyword.get('suggestions', [])
+        for key in ('keyword_ats_score', 'keyword_match', 'keyword_suggestions'):
+            provenance[key] = KEYWORD_SOURCE
+    merged['provenance'] = provenance
+    return merged